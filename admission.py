@@ -0,0 +1,195 @@
+"""
+Admission control for the extraction endpoints: requests are turned away with a
+429 and a Retry-After hint when the extraction executor is backed up, when too
+many upload bytes are already being processed, or when the caller's API key has
+spent its token bucket. Callers without a configured key share one bucket per
+client address. Replaces fixed per-IP request rates, so throughput
+follows the capacity actually free.
+"""
+import os
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from starlette.responses import JSONResponse
+
+# Configuration (override through environment variables)
+# Tasks waiting for a worker before new requests are turned away (0 = 4 per worker)
+ADMISSION_MAX_QUEUE_DEPTH = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "0"))
+# Request body bytes being processed at once, across all clients
+ADMISSION_MAX_INFLIGHT_BYTES = int(os.getenv("ADMISSION_MAX_INFLIGHT_BYTES", str(256 * 1024 * 1024)))
+# Token bucket per API key: refill rate in tokens per second and bucket size
+ADMISSION_RATE = float(os.getenv("ADMISSION_RATE", "0.5"))
+ADMISSION_BURST = float(os.getenv("ADMISSION_BURST", "30"))
+# A request costs its route's base cost plus one token per this many body bytes
+ADMISSION_BYTES_PER_TOKEN = int(os.getenv("ADMISSION_BYTES_PER_TOKEN", str(1024 * 1024)))
+
+# Callers with one of these keys (comma-separated) in the header get a bucket of their
+# own; everyone else, including unknown keys, is keyed by client address
+ADMISSION_API_KEYS = frozenset(key.strip() for key in os.getenv("ADMISSION_API_KEYS", "").split(",") if key.strip())
+API_KEY_HEADER = b"x-api-key"
+
+# Buckets kept in memory, least recently used keys are dropped first
+MAX_BUCKETS = 10000
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, rate: float, capacity: float, now: float):
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class AdmissionController:
+    def __init__(self, queue_depth: Callable[[], int], workers: int, max_queue_depth: int = None,
+                 max_inflight_bytes: int = None, rate: float = None, burst: float = None,
+                 bytes_per_token: int = None):
+        """
+        queue_depth - callable returning the tasks waiting for an extraction worker
+        workers     - extraction workers, used to estimate how fast the queue drains
+        The remaining limits default to the ADMISSION_* settings.
+        """
+        self.queue_depth = queue_depth
+        self.workers = max(workers, 1)
+        self.max_queue_depth = max_queue_depth or ADMISSION_MAX_QUEUE_DEPTH or 4 * self.workers
+        self.max_inflight_bytes = max_inflight_bytes or ADMISSION_MAX_INFLIGHT_BYTES
+        self.rate = rate or ADMISSION_RATE
+        self.burst = burst or ADMISSION_BURST
+        self.bytes_per_token = bytes_per_token or ADMISSION_BYTES_PER_TOKEN
+
+        self.inflight_bytes = 0
+        self.inflight_requests = 0
+        self.task_seconds = 0.5  # moving average of one extraction task
+        self.rejections = {"queue_depth": 0, "inflight_bytes": 0, "rate": 0}
+        self._buckets = OrderedDict()
+
+    def observe_task(self, seconds: float):
+        """Feed the duration of a finished extraction task into the drain estimate"""
+        self.task_seconds += 0.1 * (seconds - self.task_seconds)
+
+    def cost(self, base_cost: float, size: int) -> float:
+        return base_cost + size / self.bytes_per_token
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+            while len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.refill(self.rate, self.burst, now)
+        return bucket
+
+    def admit(self, key: str, base_cost: float, size: int) -> Optional[Tuple[str, float]]:
+        """
+        Reserve capacity for a request of size body bytes. Returns None when it is
+        admitted (call release(size) once it is done), otherwise (reason, seconds
+        to wait before retrying).
+        """
+        depth = self.queue_depth()
+        if depth >= self.max_queue_depth:
+            # Time for the workers to work through the excess queue
+            wait = (depth - self.max_queue_depth + 1) * self.task_seconds / self.workers
+            return self._reject("queue_depth", wait)
+
+        # A request larger than the whole budget still gets in on an idle server
+        if self.inflight_bytes and self.inflight_bytes + size > self.max_inflight_bytes:
+            return self._reject("inflight_bytes", self.task_seconds)
+
+        # Tokens are only taken from requests that are admitted
+        now = time.monotonic()
+        bucket = self._bucket(key, now)
+        cost = min(self.cost(base_cost, size), self.burst)
+        if bucket.tokens < cost:
+            return self._reject("rate", (cost - bucket.tokens) / self.rate)
+        bucket.tokens -= cost
+
+        self.inflight_bytes += size
+        self.inflight_requests += 1
+        return None
+
+    def release(self, size: int):
+        self.inflight_bytes -= size
+        self.inflight_requests -= 1
+
+    def _reject(self, reason: str, wait: float) -> Tuple[str, float]:
+        self.rejections[reason] += 1
+        return reason, wait
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "inflight_requests": self.inflight_requests,
+            "inflight_bytes": self.inflight_bytes,
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "task_seconds": round(self.task_seconds, 4),
+            "api_keys": len(self._buckets),
+            "rejections": dict(self.rejections),
+        }
+
+
+REJECTION_MESSAGES = {
+    "queue_depth": "Server is busy, extraction queue is full",
+    "inflight_bytes": "Server is busy, too many uploads in progress",
+    "rate": "Request budget for this API key is used up",
+}
+
+# Callers without a configured key are budgeted per address, e.g. a whole NAT
+SHARED_RATE_MESSAGE = ("Request budget for this client address is used up; it is shared by every "
+                       "caller from the same address without an API key (X-API-Key) configured on the server")
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to the routes in costs,
+    {(method, path): base cost}. Capacity is held until the response, streamed
+    or not, has been sent in full. api_keys defaults to ADMISSION_API_KEYS.
+    """
+    def __init__(self, app, controller: AdmissionController, costs: Dict[Tuple[str, str], float],
+                 api_keys: Iterable[str] = None):
+        self.app = app
+        self.controller = controller
+        self.costs = costs
+        self.api_keys = frozenset(api_keys) if api_keys is not None else ADMISSION_API_KEYS
+
+    async def __call__(self, scope, receive, send):
+        base_cost = self.costs.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if base_cost is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            # Chunked uploads have no length up front and are charged the base cost
+            size = max(int(headers.get(b"content-length", b"0")), 0)
+        except ValueError:
+            size = 0
+        # Only configured keys count, so made-up keys cannot buy fresh buckets
+        api_key = headers.get(API_KEY_HEADER, b"").decode("latin-1")
+        if api_key in self.api_keys:
+            key = "key:" + api_key
+        else:
+            client = scope.get("client")
+            key = "ip:" + (client[0] if client else "unknown")
+
+        rejected = self.controller.admit(key, base_cost, size)
+        if rejected is not None:
+            reason, wait = rejected
+            detail = SHARED_RATE_MESSAGE if reason == "rate" and key.startswith("ip:") else REJECTION_MESSAGES[reason]
+            response = JSONResponse(
+                {"detail": detail, "reason": reason},
+                status_code=429,
+                headers={"Retry-After": str(max(math.ceil(wait), 1))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(size)
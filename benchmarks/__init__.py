@@ -0,0 +1,7 @@
+"""
+Benchmarks for the extractor and the API, run as scripts from the repository root:
+
+    python benchmarks/import_budget.py                  # start-up import time budget
+    python benchmarks/synthetic_invoices.py -o corpus/  # synthetic invoice PDFs
+    python benchmarks/run_benchmarks.py --save baseline.json
+"""
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Start-up time budget: every module is imported in a fresh interpreter a few
+times, and the run fails (exit code 1) when the median import time of a module
+is over its budget, or when a module pulls in a heavy dependency it must not
+load at import time (e.g. openpyxl for the API, fastapi for an extraction worker).
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --runs 9 --output import_times.json
+    python benchmarks/import_budget.py --scale 2    # slower machine, double every budget
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies loaded on first use only
+EXCEL = ("openpyxl", "pandas", "pyarrow")
+SERVER = ("fastapi", "starlette", "uvicorn", "gunicorn")
+
+# module: (budget in milliseconds, modules it must not import)
+BUDGETS = {
+    # Extraction workers import only these
+    "extracter_logic": (250, SERVER + EXCEL + ("pdfminer.high_level",)),
+    "text_cache": (250, SERVER + EXCEL + ("pdfminer.high_level",)),
+    "worker_pool": (100, SERVER + EXCEL + ("pdfminer",)),
+    "metrics": (20, SERVER + EXCEL + ("pdfminer",)),
+    # Export helpers, workbooks and Parquet files load their libraries when written
+    "excel_generator": (50, SERVER + EXCEL),
+    "export_formats": (50, SERVER + EXCEL),
+    "bulk_extract": (300, SERVER + EXCEL),
+    "extract_invoice_api": (1200, EXCEL + ("uvicorn", "gunicorn", "pdfminer.high_level")),
+    # Re-imported as the main module of every spawned extraction worker
+    "run_api": (50, SERVER + EXCEL + ("pdfminer",)),
+}
+
+# Run in the child interpreter: time one import and list what it loaded
+PROBE = """
+import sys, json, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+def measure(module: str) -> dict:
+    """Import time and loaded modules of one fresh import"""
+    # Keep the API from creating its database and caches in the working directory
+    env = dict(os.environ, INVOICE_DB_PATH="", TEXT_CACHE_DIR="", EXTRACTION_CACHE_DIR="")
+    with tempfile.TemporaryDirectory() as cwd:
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(root=ROOT, module=module)],
+            cwd=cwd, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def loaded(forbidden: tuple, modules: list) -> list:
+    """Forbidden packages (or any of their submodules) among the loaded modules"""
+    return sorted({name for name in forbidden
+                   for module in modules if module == name or module.startswith(name + ".")})
+
+def run(modules: list, runs: int, scale: float) -> dict:
+    results = {}
+    for module in modules:
+        budget_ms, forbidden = BUDGETS[module]
+        samples = [measure(module) for _ in range(runs)]
+        times_ms = [sample["seconds"] * 1000 for sample in samples]
+        median_ms = statistics.median(times_ms)
+        results[module] = {
+            "median_ms": round(median_ms, 1),
+            "min_ms": round(min(times_ms), 1),
+            "budget_ms": budget_ms * scale,
+            "modules_loaded": len(samples[0]["modules"]),
+            "forbidden_loaded": loaded(forbidden, samples[0]["modules"]),
+        }
+        results[module]["ok"] = (median_ms <= budget_ms * scale and not results[module]["forbidden_loaded"])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of every module against its budget")
+    parser.add_argument("modules", nargs="*", help=f"Modules to check (default: all of {', '.join(BUDGETS)})")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh imports per module, the median is compared")
+    parser.add_argument("--scale", type=float, default=float(os.getenv("IMPORT_BUDGET_SCALE", "1")),
+                        help="Multiply every budget, for slower machines")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    unknown = [module for module in args.modules if module not in BUDGETS]
+    if unknown:
+        parser.error(f"No budget for {', '.join(unknown)}")
+
+    print(f"⏱️ Importing each module {args.runs} time(s) in a fresh interpreter...")
+    results = run(args.modules or list(BUDGETS), args.runs, args.scale)
+
+    for module, result in results.items():
+        mark = "✅" if result["ok"] else "❌"
+        line = f"{mark} {module:<22} {result['median_ms']:>8.1f} ms  (budget {result['budget_ms']:g} ms)"
+        if result["forbidden_loaded"]:
+            line += f"  loads {', '.join(result['forbidden_loaded'])}"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                       "runs": args.runs, "results": results}, f, indent=2)
+        print(f"📄 Results: {args.output}")
+
+    failed = [module for module, result in results.items() if not result["ok"]]
+    if failed:
+        print(f"❌ Over budget: {', '.join(failed)}")
+        sys.exit(1)
+    print("✅ Every module is within its import budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the extraction pipeline and the API over a synthetic invoice corpus.
+
+Suites:
+    extract_text      first-page text with each PDF backend (high_level is pdfminer's extract_text)
+    extract_invoice   extract_invoice_data, overall and by line-item count
+    simple_table      extract_simple_table_data on first-page texts
+    excel             ExcelGenerator writing a new workbook and appending to it
+    api               POST /extract-invoice at several client concurrencies
+
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json       # exit code 1 on a regression
+    python benchmarks/run_benchmarks.py --suite api --concurrency 1 8 32
+    python benchmarks/run_benchmarks.py --suite api --url http://localhost:8000   # an already running server
+
+Without --corpus the invoices are generated in memory (--count, --seed), so two
+runs with the same options measure the same documents.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_invoices import generate, load_corpus  # noqa: E402
+
+SUITES = ("extract_text", "extract_invoice", "simple_table", "excel", "api")
+
+# Line-item buckets extract_invoice is broken down by (upper bound, label)
+ITEM_BUCKETS = ((1, "1 item"), (5, "2-5 items"), (None, "6+ items"))
+
+# Relative change of a median (or throughput) flagged by --compare; lower it on a quiet
+# machine, or use --repeat to steady the medians
+DEFAULT_THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", "0.25"))
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+def summarize(latencies: list, wall_seconds: float = None, **extra) -> dict:
+    """
+    Latency percentiles in milliseconds. Throughput is per second of wall-clock
+    time when given (concurrent runs), else per second of summed latency.
+    """
+    wall_seconds = wall_seconds if wall_seconds is not None else sum(latencies)
+    summary = {
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "throughput_per_s": len(latencies) / wall_seconds if wall_seconds else 0.0,
+    }
+    summary = {key: round(value, 4) if isinstance(value, float) else value for key, value in summary.items()}
+    summary.update(extra)
+    return summary
+
+def timed(fn, items: list, repeat: int = 1) -> list:
+    """Seconds of fn(item) for every item, repeat passes over the list"""
+    latencies = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# In-process suites
+
+def bench_extract_text(corpus: list, repeat: int) -> dict:
+    from extracter_logic import PDF_BACKENDS, extract_page_text
+    results = {}
+    for backend in PDF_BACKENDS:
+        # The first call builds the per-worker pdfminer pipeline
+        extract_page_text(corpus[0][2], backend)
+        latencies = timed(lambda pdf: extract_page_text(pdf, backend), [pdf for _, _, pdf in corpus], repeat)
+        results[f"extract_text[{backend}]"] = summarize(latencies)
+    return results
+
+def bench_extract_invoice(corpus: list, repeat: int) -> dict:
+    from extracter_logic import extract_invoice_data
+    extract_invoice_data(corpus[0][2])
+
+    latencies, by_bucket, failures = [], {label: [] for _, label in ITEM_BUCKETS}, 0
+    for _ in range(repeat):
+        for filename, invoice, pdf in corpus:
+            start = time.perf_counter()
+            result = extract_invoice_data(pdf, filename)
+            seconds = time.perf_counter() - start
+            latencies.append(seconds)
+            items = len(invoice["items"])
+            label = next(label for bound, label in ITEM_BUCKETS if bound is None or items <= bound)
+            by_bucket[label].append(seconds)
+            # A parser that stops finding fields gets faster, so wrong results are counted too
+            if result.get("invoice_number") != invoice["invoice_number"] or len(result.get("descriptions") or []) != items:
+                failures += 1
+
+    results = {"extract_invoice_data": summarize(latencies, mismatches=failures)}
+    for label, bucket in by_bucket.items():
+        if bucket:
+            results[f"extract_invoice_data[{label}]"] = summarize(bucket)
+    return results
+
+def bench_simple_table(corpus: list, repeat: int) -> dict:
+    from extracter_logic import extract_page_text, extract_simple_table_data
+    texts = [extract_page_text(pdf) for _, _, pdf in corpus]
+    # Too fast to time one call at a time, so each sample is 100 calls
+    latencies = timed(lambda text: [extract_simple_table_data(text) for _ in range(100)], texts, repeat)
+    return {"extract_simple_table_data": summarize([seconds / 100 for seconds in latencies])}
+
+def bench_excel(corpus: list, repeat: int) -> dict:
+    from excel_generator import ExcelGenerator
+    from extracter_logic import extract_invoice_data
+    data = [extract_invoice_data(pdf, filename) for filename, _, pdf in corpus]
+    rows = sum(max(len(result.get("descriptions") or []), 1) for result in data)
+
+    create, append = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        for run in range(max(repeat, 3)):
+            generator = ExcelGenerator(f"bench_{run}.xlsx", directory)
+            start = time.perf_counter()
+            generator.create_or_append_excel(data)
+            create.append(time.perf_counter() - start)
+            # Appending copies the existing rows into a new workbook first
+            start = time.perf_counter()
+            generator.create_or_append_excel(data)
+            append.append(time.perf_counter() - start)
+    return {
+        "excel_generator[create]": summarize(create, invoices=len(data), rows=rows),
+        "excel_generator[append]": summarize(append, invoices=len(data), rows=rows),
+    }
+
+
+# API suite
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int = None) -> tuple:
+    """
+    Start the API with uvicorn in a subprocess, returns (process, base url). The
+    extraction cache, invoice store and text cache are disabled so every request
+    parses its PDF, and admission limits are lifted so none is turned away.
+    """
+    port = _free_port()
+    env = dict(os.environ,
+               EXTRACTION_CACHE_MAX_ENTRIES="0", EXTRACTION_CACHE_DIR="",
+               INVOICE_DB_PATH="", TEXT_CACHE_DIR="",
+               ADMISSION_MAX_QUEUE_DEPTH="1000000", ADMISSION_MAX_INFLIGHT_BYTES=str(2 ** 40),
+               ADMISSION_RATE="1000000", ADMISSION_BURST="1000000")
+    if workers:
+        env["EXTRACTION_WORKERS"] = str(workers)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "extract_invoice_api:app", "--app-dir", ROOT,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=tempfile.gettempdir(), env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    wait_for_server(url, process)
+    return process, url
+
+def wait_for_server(url: str, process: subprocess.Popen = None, timeout: float = 120):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/health", timeout=2).ok:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"API server at {url} did not come up within {timeout:.0f}s")
+
+def load_api(url: str, corpus: list, concurrency: int, requests_count: int) -> dict:
+    """requests_count uploads from concurrency client threads, cycling through the corpus"""
+    import requests
+    sessions = threading.local()
+
+    def upload(index: int) -> tuple:
+        session = getattr(sessions, "session", None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        filename, _, pdf = corpus[index % len(corpus)]
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url}/extract-invoice",
+                                    files={"file": (filename, pdf, "application/pdf")}, timeout=300)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(upload, range(requests_count)))
+    wall_seconds = time.perf_counter() - start
+
+    latencies = [seconds for seconds, status in outcomes if status == 200]
+    errors = len(outcomes) - len(latencies)
+    if not latencies:
+        return {"count": 0, "errors": errors}
+    return summarize(latencies, wall_seconds, errors=errors, concurrency=concurrency)
+
+def bench_api(corpus: list, concurrency: list, requests_count: int, url: str = None, workers: int = None) -> dict:
+    process = None
+    if url is None:
+        process, url = start_server(workers)
+    else:
+        wait_for_server(url)
+    try:
+        # One pass to warm up the workers (the server's own warm-up may still be running)
+        load_api(url, corpus, max(concurrency), min(len(corpus), 2 * max(concurrency)))
+        results = {}
+        for clients in concurrency:
+            results[f"api_extract_invoice[c={clients}]"] = load_api(url, corpus, clients, requests_count)
+        return results
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+# Baselines
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print every benchmark against the baseline. Returns the regressions: medians
+    that grew, or throughputs that fell, by more than threshold.
+    """
+    regressions = []
+    if baseline["environment"].get("platform") != current["environment"]["platform"]:
+        print(f"⚠️ Baseline was recorded on {baseline['environment'].get('platform')}, timings may not be comparable")
+    if baseline.get("corpus") != current["corpus"]:
+        print(f"⚠️ Baseline corpus {baseline.get('corpus')} differs from {current['corpus']}")
+
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before.get("count") or not result.get("count"):
+            print(f"   {name:<40} (no baseline)")
+            continue
+        # Latency for the in-process suites, throughput under load for the API
+        if name.startswith("api_"):
+            metric, change = "throughput_per_s", before["throughput_per_s"] / result["throughput_per_s"] - 1
+        else:
+            metric, change = "p50_ms", result["p50_ms"] / before["p50_ms"] - 1
+        if change > threshold:
+            mark = "❌"
+            regressions.append(name)
+        elif change < -threshold:
+            mark = "🚀"
+        else:
+            mark = "✅"
+        print(f"{mark} {name:<40} {metric} {before[metric]:>10.3f} -> {result[metric]:>10.3f}  "
+              f"({'slower' if change > 0 else 'faster'} by {abs(change):.0%})")
+    return regressions
+
+
+def print_results(results: dict):
+    print(f"\n{'benchmark':<42}{'count':>7}{'p50 ms':>11}{'p90 ms':>11}{'p99 ms':>11}{'per s':>10}")
+    for name, result in results.items():
+        if not result.get("count"):
+            print(f"{name:<42}{0:>7}  all requests failed ({result.get('errors', 0)} errors)")
+            continue
+        line = (f"{name:<42}{result['count']:>7}{result['p50_ms']:>11.3f}{result['p90_ms']:>11.3f}"
+                f"{result['p99_ms']:>11.3f}{result['throughput_per_s']:>10.1f}")
+        if result.get("errors") or result.get("mismatches"):
+            line += f"  ⚠️ {result.get('errors') or result.get('mismatches')} failed"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the invoice extractor and the API")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES), help="Suites to run (default: all)")
+    parser.add_argument("--corpus", help="Directory written by synthetic_invoices.py (default: generate in memory)")
+    parser.add_argument("-n", "--count", type=int, default=300, help="Invoices to generate without --corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated corpus")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus for the in-process suites")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Client threads for the API suite")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--url", help="Benchmark a running API server instead of starting one")
+    parser.add_argument("--workers", type=int, help="EXTRACTION_WORKERS of the server started for the API suite")
+    parser.add_argument("--save", help="Write the results to this JSON file, to compare later runs against")
+    parser.add_argument("--compare", help="Baseline JSON file; exit code 1 if a benchmark regressed")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown flagged as a regression (default 0.25)")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+        corpus_info = {"directory": os.path.abspath(args.corpus), "count": len(corpus)}
+    else:
+        print(f"📄 Generating {args.count} synthetic invoices (seed {args.seed})...")
+        corpus = list(generate(args.count, args.seed))
+        corpus_info = {"seed": args.seed, "count": args.count}
+
+    results = {}
+    for suite in args.suite:
+        print(f"⏱️ Running {suite}...")
+        started = time.perf_counter()
+        if suite == "extract_text":
+            results.update(bench_extract_text(corpus, args.repeat))
+        elif suite == "extract_invoice":
+            results.update(bench_extract_invoice(corpus, args.repeat))
+        elif suite == "simple_table":
+            results.update(bench_simple_table(corpus, args.repeat))
+        elif suite == "excel":
+            results.update(bench_excel(corpus, args.repeat))
+        elif suite == "api":
+            results.update(bench_api(corpus, args.concurrency, args.requests, args.url, args.workers))
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+
+    print_results(results)
+    report = {"environment": environment(), "corpus": corpus_info, "results": results}
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n📊 Compared with {args.compare} (threshold {args.threshold:.0%}):")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Synthetic Amazon India tax invoices for benchmarking. The PDFs are written by
+hand (standard Helvetica, WinAnsi encoding with ₹ mapped through a ToUnicode
+CMap, page content in a form XObject like the real invoices), so no PDF library
+is needed and the same seed always gives the same corpus.
+
+Invoices vary in line-item count (and so page count), description length and
+seller/billing address length. A manifest.json next to the PDFs records the
+values each invoice was generated with.
+
+    python benchmarks/synthetic_invoices.py -n 2000 -o corpus/
+"""
+import os
+import json
+import random
+import argparse
+from pdfminer.fontmetrics import FONT_METRICS
+from pdfminer.latin_enc import ENCODING
+
+# A4 in points, as on the real invoices
+PAGE_WIDTH, PAGE_HEIGHT = 597.6, 842.4
+
+# WinAnsi code the ₹ sign is drawn with (the € slot, mapped to U+20B9 by the ToUnicode CMap)
+RUPEE_CODE = 0x80
+_WIDTHS = FONT_METRICS["Helvetica"][1]
+_WIN_NAMES = {win: name for name, _, _, win, _ in ENCODING if win is not None}
+
+def _code(ch: str) -> int:
+    return RUPEE_CODE if ch == "₹" else ord(ch)
+
+def char_width(code: int) -> int:
+    """Glyph width in thousandths of the font size"""
+    if code == RUPEE_CODE:
+        return 556
+    return _WIDTHS.get(_WIN_NAMES.get(code), 556)
+
+def text_width(text: str, size: float) -> float:
+    return sum(char_width(_code(ch)) for ch in text) * size / 1000
+
+def _pdf_string(text: str) -> str:
+    out = []
+    for ch in text:
+        code = _code(ch)
+        if ch in "()\\":
+            out.append("\\" + ch)
+        elif 32 <= code < 127:
+            out.append(ch)
+        else:
+            out.append(f"\\{code:03o}")
+    return "(" + "".join(out) + ")"
+
+def wrap(text: str, width: float, size: float) -> list:
+    """Break text into lines no wider than width points"""
+    lines, line = [], ""
+    for word in text.split(" "):
+        candidate = f"{line} {word}".strip()
+        if line and text_width(candidate, size) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+class Page:
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x: float, y: float, text: str, size: float = 7.8):
+        self.ops.append(f"BT /F1 {size} Tf {x:.2f} {y:.2f} Td {_pdf_string(text)} Tj ET")
+
+    def stream(self) -> bytes:
+        return "\n".join(self.ops).encode("latin-1")
+
+
+TOUNICODE = b"""/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def
+/CMapName /Adobe-Identity-UCS def
+/CMapType 2 def
+1 begincodespacerange
+<00> <FF>
+endcodespacerange
+1 beginbfchar
+<80> <20B9>
+endbfchar
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end
+"""
+
+def _stream(dictionary: bytes, data: bytes) -> bytes:
+    return dictionary[:-2] + b"/Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+
+def build_pdf(pages: list) -> bytes:
+    """PDF file with one page per Page, all sharing one font"""
+    catalog_id, pages_id, font_id, tounicode_id = 1, 2, 3, 4
+    widths = " ".join(str(char_width(code)) for code in range(32, 256))
+    objects = {
+        font_id: (f"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                  f"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [128 /rupee] >> "
+                  f"/FirstChar 32 /LastChar 255 /Widths [{widths}] /ToUnicode {tounicode_id} 0 R >>").encode(),
+        tounicode_id: _stream(b"<< >>", TOUNICODE),
+    }
+
+    # Each page draws a form XObject holding its text
+    kids = []
+    next_id = tounicode_id + 1
+    for page in pages:
+        form_id, content_id, page_id = next_id, next_id + 1, next_id + 2
+        next_id += 3
+        objects[form_id] = _stream(
+            f"<< /Type /XObject /Subtype /Form /BBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode(), page.stream())
+        objects[content_id] = _stream(b"<< >>", b"q /Xf1 Do Q")
+        objects[page_id] = (f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                            f"/Resources << /XObject << /Xf1 {form_id} 0 R >> >> /Contents {content_id} 0 R >>").encode()
+        kids.append(page_id)
+    objects[pages_id] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode()
+    objects[catalog_id] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref = len(out)
+    count = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % count
+    for obj_id in range(1, count):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, catalog_id, xref)
+    return bytes(out)
+
+
+# Line-item table columns: x position and header words
+COLUMNS = [(43.5, ("Sl.", "No")), (57.8, ("Description",)), (340.5, ("Unit", "Price")), (375.5, ("Qty",)),
+           (392.8, ("Net", "Amount")), (429.0, ("Tax", "Rate")), (450.8, ("Tax", "Type")),
+           (478.1, ("Tax", "Amount")), (514.4, ("Total", "Amount"))]
+
+def _table_header(page: Page, y: float) -> float:
+    for x, words in COLUMNS:
+        if len(words) == 2:
+            page.text(x, y, words[0])
+            page.text(x, y - 10.7, words[1])
+        else:
+            page.text(x, y - 5.3, words[0])
+    return y - 10.7
+
+def money(value: float) -> str:
+    return f"₹{value:,.2f}"
+
+def _address_block(page: Page, x: float, y: float, lines: list) -> float:
+    for line in lines:
+        page.text(x, y, line, 11.2)
+        y -= 11.5
+    return y
+
+def invoice_pdf(invoice: dict) -> bytes:
+    """PDF of an invoice made by random_invoice()"""
+    pages = [Page()]
+    page = first = pages[0]
+    first.text(310, 811.2, "Tax Invoice/Bill of Supply/Cash Memo", 13.5)
+    first.text(422, 795.5, "(Original for Recipient)", 13.5)
+
+    # Seller on the left, billing and shipping addresses on the right
+    first.text(43, 727.6, "Sold By :", 11.2)
+    first.text(43, 714.6, f"{invoice['seller_name']} ", 11.2)
+    first.text(43, 703.7, "*", 9.3)
+    y = _address_block(first, 46, 699, wrap(invoice["seller_address"], 240, 11.2))
+    first.text(43, y, "IN", 11.2)
+    first.text(43, y - 20, f"PAN No:{invoice['gst_registration_no'][2:12]} ", 11.2)
+    first.text(43, y - 33.4, f"GST Registration No:{invoice['gst_registration_no']}", 11.2)
+
+    first.text(463, 727.6, "Billing Address :", 11.2)
+    y = _address_block(first, 302, 714, wrap(invoice["billing_address"], 250, 11.2))
+    first.text(456, y, f"State/UT Code:{invoice['state_ut_code']} ", 11.2)
+    first.text(449, y - 20, "Shipping Address :", 11.2)
+    y = _address_block(first, 302, y - 33, wrap(invoice["billing_address"], 250, 11.2))
+    first.text(456, y, f"State/UT Code:{invoice['state_ut_code']} ", 11.2)
+    first.text(377, y - 13.4, f"Place of supply:{invoice['place_of_supply']} ", 11.2)
+    first.text(370, y - 26.8, f"Place of delivery:{invoice['place_of_supply']} ", 11.2)
+
+    y = min(y - 50, 515)
+    first.text(42.8, y, f"Order Number:{invoice['order_number']}", 11.2)
+    first.text(388.1, y, f"Invoice Number :{invoice['invoice_number']} ", 11.2)
+    first.text(42.8, y - 14.9, f"Order Date:{invoice['order_date']}", 11.2)
+    first.text(318.6, y - 14.9, f"Invoice Details :{invoice['invoice_details']}", 11.2)
+    first.text(423, y - 29.9, f"Invoice Date :{invoice['invoice_date']}", 11.2)
+
+    # Line items, continued on new pages
+    y = _table_header(first, y - 57) - 10
+    total = tax_total = 0.0
+    for index, item in enumerate(invoice["items"]):
+        lines = wrap(item["description"], 275, 9) + [f"HSN:{item['hsn']}"]
+        if y - 10.4 * len(lines) - 40 < 60:
+            page.text(530, 34.5, f"Page {len(pages)}", 5.6)
+            page = Page()
+            pages.append(page)
+            y = _table_header(page, 780) - 10
+        net = item["price"] * item["qty"]
+        tax = round(net * item["rate"] / 100, 2)
+        tax_total += tax
+        total += net + tax
+
+        top = y
+        page.text(57.8, y, lines[0])
+        page.text(47.6, y - 3, str(index + 1), 8.5)
+        for line in lines[1:]:
+            y -= 10.4
+            page.text(57.8, y, line)
+        middle = top - 21.9
+        page.text(340.5, middle, money(item["price"]), 8.5)
+        page.text(381.1, middle, str(item["qty"]), 8.5)
+        page.text(393.4, middle, money(net), 8.5)
+        page.text(432.3, middle, f"{item['rate']}%", 8.5)
+        page.text(450.8, middle + 1.3, "IGST")
+        page.text(480.4, middle, money(tax), 8.5)
+        page.text(515.5, middle, money(net + tax), 8.5)
+        y = min(y, middle) - 16
+
+    page.text(44, y, "TOTAL:")
+    page.text(480.4, y - 2.4, money(tax_total), 8.5)
+    page.text(514.4, y - 2.4, money(total), 8.5)
+    page.text(43, y - 18, "Amount in Words:", 11.2)
+    page.text(43, y - 33, "Rupees only", 11.2)
+    page.text(530, 34.5, f"Page {len(pages)}", 5.6)
+    return build_pdf(pages)
+
+
+WORDS = ("Cotton Steel Premium Wireless Kitchen Organic Football Men Women Pack Set Blue Black Large "
+         "Cable Charger Bottle Stainless Bluetooth Headphones Non-Stick Cookware Combo Printed Slim Fit "
+         "Shirt Travel Backpack Water Resistant Laptop Sleeve Inch Ceramic Mug LED Desk Lamp").split()
+STREETS = ("Building No. 5", "Plot 12, Sector 8", "Survey No. 221/3", "Unit 4, Ground Floor", "Gala No. 17",
+           "Warehouse 2, Phase II", "Khasra No. 34/21")
+LOCALITIES = ("Bhiwandi", "Sohna Road", "Hoskote Industrial Area", "Chakan MIDC", "Whitefield",
+              "Kolkata Logistics Park", "Near Highway Toll Plaza", "Opposite Railway Crossing")
+CITIES = (("Thane", "MAHARASHTRA", "27"), ("Gurugram", "HARYANA", "06"), ("Bengaluru", "KARNATAKA", "29"),
+          ("Pune", "MAHARASHTRA", "27"), ("Howrah", "WESTBENGAL", "19"))
+
+def _address(rng: random.Random, parts: int) -> str:
+    city, state, _ = rng.choice(CITIES)
+    streets = rng.sample(STREETS, min(parts, len(STREETS)))
+    localities = rng.sample(LOCALITIES, min(parts, len(LOCALITIES)))
+    return ", ".join(streets + localities + [city, state, str(rng.randrange(110000, 800000))])
+
+def random_invoice(rng: random.Random, items: int = None, address_parts: int = None) -> dict:
+    """
+    Invoice values drawn from rng. items and address_parts (1 = one short line,
+    4 = several wrapped lines) are random when not given; most invoices get one
+    to three items, some run to several pages.
+    """
+    if items is None:
+        items = rng.choice((1, 1, 1, 2, 2, 3, 4, 6, 10, 20, 40))
+    if address_parts is None:
+        address_parts = rng.randint(1, 4)
+    _, state, code = rng.choice(CITIES)
+    day = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2025"
+    return {
+        "order_number": f"{rng.randrange(400, 410)}-{rng.randrange(10**7):07d}-{rng.randrange(10**7):07d}",
+        "order_date": day,
+        "invoice_number": f"BOM{rng.randrange(1, 10)}-{rng.randrange(10**5, 10**6)}",
+        "invoice_details": f"MH-BOM7-{rng.randrange(10**9, 10**10)}-2526",
+        "invoice_date": day,
+        "seller_name": rng.choice(("RETAILEZ PRIVATE LIMITED", "CLICKTECH RETAIL PRIVATE LIMITED",
+                                   "APPARIO RETAIL PRIVATE LTD")),
+        "seller_address": _address(rng, address_parts),
+        "billing_address": _address(rng, address_parts),
+        "gst_registration_no": f"{code}AALCR{rng.randrange(1000, 10000)}P1ZN",
+        "state_ut_code": code,
+        "place_of_supply": state,
+        "items": [{
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(4, 30)))
+                           + f" | B0{rng.randrange(10**7, 10**8)}",
+            "hsn": str(rng.randrange(10**7, 10**8)),
+            "price": rng.randrange(100, 500000) / 100,
+            "qty": rng.randrange(1, 5),
+            "rate": rng.choice((5, 12, 18)),
+        } for _ in range(items)],
+    }
+
+def generate(count: int, seed: int = 0):
+    """Yield (filename, invoice, pdf bytes) for count invoices"""
+    rng = random.Random(seed)
+    for index in range(count):
+        invoice = random_invoice(rng)
+        yield f"invoice_{index + 1:05d}.pdf", invoice, invoice_pdf(invoice)
+
+def write_corpus(directory: str, count: int, seed: int = 0) -> dict:
+    """Write count PDFs and their manifest.json to directory, returns the manifest"""
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"seed": seed, "count": count, "invoices": {}}
+    for filename, invoice, pdf in generate(count, seed):
+        with open(os.path.join(directory, filename), "wb") as f:
+            f.write(pdf)
+        manifest["invoices"][filename] = invoice
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+def load_corpus(directory: str) -> list:
+    """[(filename, invoice, pdf bytes)] of a corpus written by write_corpus"""
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    corpus = []
+    for filename, invoice in manifest["invoices"].items():
+        with open(os.path.join(directory, filename), "rb") as f:
+            corpus.append((filename, invoice, f.read()))
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Amazon invoice PDFs")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="Number of invoices")
+    parser.add_argument("-o", "--output", default="corpus", help="Output directory")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, the same seed gives the same corpus")
+    args = parser.parse_args()
+
+    print(f"📄 Generating {args.count} invoices (seed {args.seed})...")
+    write_corpus(args.output, args.count, args.seed)
+    print(f"✅ Corpus written to {args.output}")
+
+if __name__ == "__main__":
+    main()
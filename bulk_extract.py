@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Offline bulk extraction: walk a directory of invoice PDFs, extract them on all
+cores and stream the results to NDJSON, CSV or Excel. Finished files are
+recorded in a checkpoint manifest so an interrupted run resumes where it stopped.
+
+    python bulk_extract.py Data/ --output invoices.ndjson
+    python bulk_extract.py /archive --output invoices.csv --workers 16
+
+With --text-cache the page text of every PDF is kept on disk; after a parser
+change, --reextract re-runs the field parsers over that text without pdfminer:
+
+    python bulk_extract.py /archive -o invoices.ndjson --text-cache text_cache
+    python bulk_extract.py --reextract --text-cache text_cache -o invoices_v2.ndjson
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, wait
+from extracter_logic import extract_invoice_data
+from excel_generator import COLUMNS, ExcelRowWriter, invoice_rows
+from worker_pool import create_executor, default_workers, WorkerLimitExceeded
+from invoice_store import InvoiceStore
+from result_cache import content_digest
+from text_cache import TextCache, extract_cached, reextract_batch
+
+OUTPUT_FORMATS = ("ndjson", "csv", "xlsx")
+
+def find_pdfs(root: str):
+    """Relative paths of all PDFs below root, in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(".pdf"):
+                yield os.path.relpath(os.path.join(dirpath, name), root)
+
+def extract_file(root: str, relpath: str, text_cache: str = None) -> tuple:
+    """
+    Worker entry point: (content digest, result), the digest keys the invoice
+    store. Unexpected errors are reported as a failed result.
+    """
+    digest = None
+    try:
+        # Read once, hash, and parse from memory
+        with open(os.path.join(root, relpath), "rb") as f:
+            content = f.read()
+        digest = content_digest(content)
+        if text_cache:
+            return digest, extract_cached(content, relpath, text_cache, digest)
+        return digest, extract_invoice_data(content, filename=relpath)
+    except Exception as e:
+        return digest, {"filename": relpath, "status": "failed", "error": str(e), "error_reason": "error"}
+
+class NdjsonSink:
+    """One full result dict per line"""
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, result: dict):
+        self.file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CsvSink(NdjsonSink):
+    """One row per line item, in the Excel column order"""
+    def __init__(self, path: str):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        if is_new:
+            self.writer.writerow(COLUMNS)
+
+    def write(self, result: dict):
+        for row in invoice_rows(result):
+            self.writer.writerow(["" if value is None else value for value in row])
+
+class ExcelSink(NdjsonSink):
+    """
+    An xlsx file can only be written in one go, so results are journaled to
+    <output>.partial.ndjson during the run and converted on close
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.journal_path = f"{path}.partial.ndjson"
+        super().__init__(self.journal_path)
+
+    def close(self):
+        super().close()
+        with open(self.journal_path, "r", encoding="utf-8") as journal:
+            with ExcelRowWriter(self.path) as writer:
+                for line in journal:
+                    writer.write(json.loads(line))
+        os.unlink(self.journal_path)
+
+SINKS = {"ndjson": NdjsonSink, "csv": CsvSink, "xlsx": ExcelSink}
+
+def load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+def run(root: str, output: str, output_format: str, checkpoint: str, workers: int,
+        report_every: float = 5.0, store: InvoiceStore = None, text_cache: str = None) -> dict:
+    done = load_checkpoint(checkpoint)
+    pending = [path for path in find_pdfs(root) if path not in done]
+    total = len(done) + len(pending)
+
+    print(f"📁 {total} PDF(s) found, {len(done)} already done, {len(pending)} to process")
+    if not pending:
+        # A run interrupted while writing the workbook still has its journal
+        if output_format == "xlsx" and os.path.exists(f"{output}.partial.ndjson"):
+            ExcelSink(output).close()
+        return {"processed": 0, "successful": 0, "failed": 0}
+
+    workers = workers or default_workers("isolated")
+    sink = SINKS[output_format](output)
+    manifest = open(checkpoint, "a", encoding="utf-8")
+    # Isolated workers, so one pathological PDF cannot stall or take down the run
+    executor = create_executor("isolated", workers)
+
+    stats = {"processed": 0, "successful": 0, "failed": 0}
+    started = last_report = time.perf_counter()
+    paths = iter(pending)
+    in_flight = {}
+
+    def submit_next():
+        path = next(paths, None)
+        if path is not None:
+            in_flight[executor.submit(extract_file, root, path, text_cache)] = path
+
+    try:
+        # Keep a few tasks queued per worker without materialising every future
+        for _ in range(workers * 4):
+            submit_next()
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = in_flight.pop(future)
+                try:
+                    digest, result = future.result()
+                except WorkerLimitExceeded as e:
+                    digest, result = None, {"filename": path, "status": "failed", "error": str(e),
+                                            "error_reason": e.reason}
+                sink.write(result)
+                if store is not None and "error" not in result:
+                    store.add(result, digest)
+                stats["processed"] += 1
+                stats["successful" if result.get("status") == "success" else "failed"] += 1
+                manifest.write(path + "\n")
+                submit_next()
+
+            # Output first, then the manifest, so a crash can only repeat a file, never lose one
+            sink.flush()
+            manifest.flush()
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                last_report = now
+                rate = stats["processed"] / (now - started)
+                remaining = (len(pending) - stats["processed"]) / rate if rate else 0
+                print(f"📊 {len(done) + stats['processed']}/{total} files | {rate:.1f} files/s | "
+                      f"{stats['failed']} failed | ~{remaining / 60:.1f} min left")
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted, run the same command again to resume")
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    manifest.close()
+    sink.close()
+
+    elapsed = time.perf_counter() - started
+    stats["files_per_second"] = round(stats["processed"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+def run_reextract(text_cache: str, output: str, output_format: str, workers: int,
+                  report_every: float = 5.0, store: InvoiceStore = None, batch_size: int = 200) -> dict:
+    """Re-run the field parsers over every text in the cache, batch_size texts per task"""
+    workers = workers or default_workers("process")
+    sink = SINKS[output_format](output)
+    executor = create_executor("process", workers)
+
+    stats = {"processed": 0, "successful": 0, "failed": 0, "skipped": 0}
+    started = last_report = time.perf_counter()
+    batches = TextCache(text_cache).digest_batches(batch_size)
+    in_flight = set()
+
+    def submit_next():
+        batch = next(batches, None)
+        if batch is not None:
+            in_flight.add(executor.submit(reextract_batch, text_cache, batch))
+
+    try:
+        for _ in range(workers * 2):
+            submit_next()
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.remove(future)
+                for digest, result in future.result():
+                    if result is None:
+                        # Cached before the table lines were, the PDF has to be extracted again
+                        stats["skipped"] += 1
+                        continue
+                    sink.write(result)
+                    if store is not None:
+                        store.add(result, digest)
+                    stats["processed"] += 1
+                    stats["successful" if result.get("status") == "success" else "failed"] += 1
+                submit_next()
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                last_report = now
+                print(f"📊 {stats['processed']} texts | {stats['processed'] / (now - started):.1f} files/s | "
+                      f"{stats['failed']} failed")
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted")
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    sink.close()
+
+    elapsed = time.perf_counter() - started
+    stats["files_per_second"] = round(stats["processed"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract every invoice PDF below a directory")
+    parser.add_argument("input_dir", nargs="?", help="Directory searched recursively for PDFs")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.ndjson, .csv or .xlsx)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, help="Output format (default: from the extension)")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Worker processes (default: one per core)")
+    parser.add_argument("--checkpoint", help="Checkpoint manifest (default: <output>.checkpoint)")
+    parser.add_argument("--text-cache", help="Directory caching the page text of every PDF")
+    parser.add_argument("--reextract", action="store_true",
+                        help="Re-run the parsers over the --text-cache texts instead of reading PDFs")
+    parser.add_argument("--db", help="Also write results to this SQLite invoice store")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    output_format = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if output_format not in OUTPUT_FORMATS:
+        parser.error(f"Cannot infer the output format of '{args.output}', use --format")
+    if args.reextract:
+        if not args.text_cache or not os.path.isdir(args.text_cache):
+            parser.error("--reextract needs an existing --text-cache directory")
+        if os.path.exists(args.output):
+            parser.error(f"'{args.output}' already exists, --reextract writes a new file")
+    elif not args.input_dir or not os.path.isdir(args.input_dir):
+        parser.error(f"'{args.input_dir}' is not a directory")
+
+    checkpoint = args.checkpoint or f"{args.output}.checkpoint"
+
+    store = InvoiceStore(args.db) if args.db else None
+
+    print("🚀 Starting bulk invoice extraction...")
+    try:
+        if args.reextract:
+            stats = run_reextract(args.text_cache, args.output, output_format,
+                                  args.workers or None, args.report_every, store)
+        else:
+            stats = run(args.input_dir, args.output, output_format, checkpoint,
+                        args.workers or None, args.report_every, store, args.text_cache)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        if store is not None:
+            store.close()
+
+    print(f"✅ Done: {stats['processed']} processed, {stats['successful']} successful, "
+          f"{stats['failed']} failed ({stats.get('files_per_second', 0)} files/s)")
+    if stats.get("skipped"):
+        print(f"⚠️ {stats['skipped']} cached texts are out of date and were skipped, extract their PDFs again")
+    print(f"📄 Results: {args.output}")
+
+if __name__ == "__main__":
+    main()
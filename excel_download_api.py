@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from excel_generator import ExcelGenerator
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from excel_generator import ExcelGenerator, ExcelRowWriter
+from export_formats import EXPORT_MEDIA_TYPES, csv_lines, ndjson_lines, write_parquet
+from metrics import STAGE_SECONDS
+import tempfile
+import time
 import os
 
 # Create a router instance
@@ -9,9 +13,86 @@ router = APIRouter()
 # Store the latest Excel file path
 latest_excel_path = None
 
+# Exports generated per cache_id are kept here and reused until they expire
+EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "invoice_exports")
+EXPORT_TTL = float(os.getenv("EXPORT_TTL", "3600"))
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def cached_results(request: Request, cache_id: str) -> list:
+    """Results stored under a cache_id by the extraction endpoints"""
+    results = request.app.state.result_cache.get(cache_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Results not found or expired. Please process the invoices again.")
+    # Single-invoice responses cache one result dict
+    return results if isinstance(results, list) else [results]
+
+def prune_exports():
+    """Remove export files older than EXPORT_TTL"""
+    cutoff = time.time() - EXPORT_TTL
+    try:
+        entries = list(os.scandir(EXPORT_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+@router.get("/export/{cache_id}")
+def export_results(request: Request, cache_id: str, format: str = "xlsx"):
+    """
+    Download the results of an extraction request by cache_id.
+    format: xlsx or parquet (generated on first use and kept), csv or ndjson (streamed row by row)
+    """
+    if format != "xlsx" and format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown export format '{format}'")
+    if cache_id not in request.app.state.result_cache:
+        raise HTTPException(status_code=404, detail="Results not found or expired. Please process the invoices again.")
+    
+    filename = f"amazon_invoices_{cache_id}.{format}"
+    
+    # Text formats are streamed straight from the cached results
+    if format == "csv":
+        return StreamingResponse(csv_lines(cached_results(request, cache_id)),
+                                 media_type=EXPORT_MEDIA_TYPES[format],
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    if format == "ndjson":
+        return StreamingResponse(ndjson_lines(cached_results(request, cache_id)),
+                                 media_type=EXPORT_MEDIA_TYPES[format],
+                                 headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+    
+    filepath = os.path.join(EXPORT_DIR, filename)
+    if not os.path.exists(filepath):
+        try:
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            prune_exports()
+            
+            results = cached_results(request, cache_id)
+            if format == "parquet":
+                write_parquet(results, filepath)
+            else:
+                # Never append: a concurrent first export of the same cache_id may have
+                # written the file meanwhile, and both write the same rows
+                with STAGE_SECONDS.time(stage="excel_generation"):
+                    with ExcelRowWriter(filepath, append=False) as writer:
+                        for result in results:
+                            writer.write(result)
+        except HTTPException:
+            raise
+        except ImportError as e:
+            raise HTTPException(status_code=501, detail=f"{format} export is not available: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Export generation failed: {str(e)}")
+    
+    media_type = XLSX_MEDIA_TYPE if format == "xlsx" else EXPORT_MEDIA_TYPES[format]
+    return FileResponse(path=filepath, filename=filename, media_type=media_type)
+
 @router.get("/download-excel")
 def download_excel():
-    """Download the generated Excel file"""
+    """Download the generated Excel file (deprecated, use /export/{cache_id})"""
     global latest_excel_path
     
     if not latest_excel_path or not os.path.exists(latest_excel_path):
@@ -20,12 +101,12 @@ def download_excel():
     return FileResponse(
         path=latest_excel_path,
         filename=os.path.basename(latest_excel_path),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type=XLSX_MEDIA_TYPE
     )
 
 @router.post("/generate-excel")
 def generate_excel(data: dict):
-    """Generate Excel file with processed invoice data"""
+    """Generate Excel file with processed invoice data (deprecated, use /export/{cache_id})"""
     try:
         global latest_excel_path
         
@@ -39,7 +120,8 @@ def generate_excel(data: dict):
         excel_gen = ExcelGenerator()
         
         # Generate Excel
-        filepath = excel_gen.create_or_append_excel(results)
+        with STAGE_SECONDS.time(stage="excel_generation"):
+            filepath = excel_gen.create_or_append_excel(results)
         
         # Store the latest file path
         latest_excel_path = filepath
@@ -52,4 +134,4 @@ def generate_excel(data: dict):
         }
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Excel generation failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Excel generation failed: {str(e)}")
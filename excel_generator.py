@@ -1,45 +1,138 @@
-import pandas as pd
 import os
-from typing import List, Dict
+import re
+import uuid
+from typing import List, Dict, Iterable
 from datetime import datetime
 
+# openpyxl is imported when a workbook is written, so modules that only need
+# COLUMNS and invoice_rows (CSV exports, the API) do not pay for it at start-up
+
+# Column order for the Excel file
+COLUMNS = [
+    'filename', 'order_number', 'order_date', 'invoice_number',
+    'invoice_details', 'invoice_date', 'gst_registration_no',
+    'state_ut_code', 'place_of_supply', 'place_of_delivery',
+    'seller_name', 'seller_address', 'billing_address',
+    'shipping_address', 'total_amount', 'descriptions',
+    'unit_prices', 'qtys', 'net_amounts', 'status'
+]
+
+# List-valued fields, one entry per line item
+LIST_COLUMNS = ('descriptions', 'unit_prices', 'qtys', 'net_amounts')
+
+# Control characters Excel rejects in strings, as in openpyxl's ILLEGAL_CHARACTERS_RE
+_ILLEGAL_CHARACTERS = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+
+def _cell(value):
+    if isinstance(value, str):
+        return _ILLEGAL_CHARACTERS.sub('', value)
+    return value
+
+def invoice_rows(data: Dict, columns: List[str] = COLUMNS) -> List[list]:
+    """
+    Rows for one invoice: one row per line item, with the invoice fields
+    repeated on each row. An invoice without line items gives a single row.
+    """
+    items = max([len(data[c]) for c in LIST_COLUMNS if isinstance(data.get(c), list)] or [0])
+    rows = []
+    for item in range(max(items, 1)):
+        row = []
+        for column in columns:
+            value = data.get(column)
+            if column in LIST_COLUMNS:
+                value = value[item] if isinstance(value, list) and item < len(value) else None
+            row.append(value)
+        rows.append(row)
+    return rows
+
+class ExcelRowWriter:
+    """
+    Write-only workbook that rows are streamed into, so memory stays flat however
+    many invoices are written. With append, rows of an existing file at filepath
+    are streamed across first (read-only, row by row) and the new rows are appended
+    after them; otherwise an existing file is overwritten. The file is replaced
+    atomically on close().
+    """
+    def __init__(self, filepath: str, columns: List[str] = COLUMNS, append: bool = True):
+        self.filepath = filepath
+        self.columns = columns
+        self.records_added = 0
+        self.rows_added = 0
+        self._temp_path = f"{filepath}.{uuid.uuid4().hex}.tmp.xlsx"
+
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Invoices")
+
+        if append and os.path.exists(filepath):
+            self._copy_existing()
+        else:
+            self._sheet.append(columns)
+
+    def _copy_existing(self):
+        from openpyxl import load_workbook
+        existing = load_workbook(self.filepath, read_only=True)
+        try:
+            for row in existing.worksheets[0].iter_rows(values_only=True):
+                self._sheet.append(row)
+        finally:
+            existing.close()
+
+    def write(self, data: Dict):
+        """Append one invoice result"""
+        for row in invoice_rows(data, self.columns):
+            self._sheet.append([_cell(value) for value in row])
+            self.rows_added += 1
+        self.records_added += 1
+
+    def close(self) -> str:
+        self._workbook.save(self._temp_path)
+        os.replace(self._temp_path, self.filepath)
+        return self.filepath
+
+    def abort(self):
+        if os.path.exists(self._temp_path):
+            os.unlink(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
 class ExcelGenerator:
-    def __init__(self, filename: str = None):
+    def __init__(self, filename: str = None, directory: str = None):
         if filename is None:
-            # Generate filename with timestamp
+            # Generate filename with timestamp, plus a random suffix so generators created
+            # in the same second never append to each other's file
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            self.filename = f"amazon_invoices_{timestamp}.xlsx"
+            self.filename = f"amazon_invoices_{timestamp}_{uuid.uuid4().hex[:8]}.xlsx"
         else:
             self.filename = filename
-        self.filepath = os.path.join(os.getcwd(), self.filename)
-    
-    def create_or_append_excel(self, data_list: List[Dict]) -> str:
+        self.filepath = os.path.join(directory or os.getcwd(), self.filename)
+        self.records_added = 0
+
+    def open_writer(self) -> ExcelRowWriter:
+        """Streaming writer for this file, appending if it already exists"""
+        return ExcelRowWriter(self.filepath)
+
+    def create_or_append_excel(self, data_list: Iterable[Dict]) -> str:
         """
-        Create new Excel file with the data
+        Write invoice results to the Excel file, appending to it if it exists.
+        data_list may be any iterable; rows are written as they are produced.
         """
-        # Define the column order for the Excel file
-        columns = [
-            'filename', 'order_number', 'order_date', 'invoice_number', 
-            'invoice_details', 'invoice_date', 'gst_registration_no', 
-            'state_ut_code', 'place_of_supply', 'place_of_delivery',
-            'seller_name', 'seller_address', 'billing_address', 
-            'shipping_address', 'total_amount', 'descriptions', 
-            'unit_prices', 'qtys', 'net_amounts', 'status'
-        ]
-        
-        # Convert list of dictionaries to DataFrame
-        df = pd.DataFrame(data_list)
-        
-        # Reorder columns to match our desired structure
-        df = df.reindex(columns=columns, fill_value='')
-        
-        # Save to Excel (always create new file)
-        df.to_excel(self.filepath, index=False)
-        
+        with self.open_writer() as writer:
+            for data in data_list:
+                writer.write(data)
+        self.records_added = writer.records_added
+
         return self.filepath
-    
+
     def get_filepath(self) -> str:
         return self.filepath
-    
+
     def file_exists(self) -> bool:
-        return os.path.exists(self.filepath)
\ No newline at end of file
+        return os.path.exists(self.filepath)
@@ -0,0 +1,134 @@
+"""
+CSV, NDJSON and Parquet exports of invoice results, in the same column order as ExcelGenerator
+"""
+import io
+import csv
+import json
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional
+from excel_generator import COLUMNS, invoice_rows
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Typed Parquet columns, everything else is stored as a string
+AMOUNT_COLUMNS = ('total_amount', 'unit_prices', 'net_amounts')
+DATE_COLUMNS = ('order_date', 'invoice_date')
+INTEGER_COLUMNS = ('qtys',)
+
+def csv_lines(data_list: Iterable[Dict], columns: List[str] = COLUMNS) -> Iterator[str]:
+    """CSV text, one line per invoice row, produced as the results are iterated"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(columns)
+    yield flush()
+    for data in data_list:
+        for row in invoice_rows(data, columns):
+            writer.writerow(["" if value is None else value for value in row])
+        yield flush()
+
+def ndjson_lines(data_list: Iterable[Dict], columns: List[str] = COLUMNS) -> Iterator[str]:
+    """One JSON object per invoice row, keys in column order"""
+    for data in data_list:
+        for row in invoice_rows(data, columns):
+            yield json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+
+def parse_amount(value) -> Optional[Decimal]:
+    """'₹1,332.38' -> Decimal('1332.38')"""
+    if not value:
+        return None
+    try:
+        return Decimal(str(value).replace('₹', '').replace(',', '').strip()).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+def parse_date(value) -> Optional[date]:
+    """'10.06.2025' -> date(2025, 6, 10)"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%d.%m.%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+def parse_integer(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parquet_schema(columns: List[str] = COLUMNS):
+    import pyarrow as pa
+
+    fields = []
+    for column in columns:
+        if column in AMOUNT_COLUMNS:
+            fields.append(pa.field(column, pa.decimal128(18, 2)))
+        elif column in DATE_COLUMNS:
+            fields.append(pa.field(column, pa.date32()))
+        elif column in INTEGER_COLUMNS:
+            fields.append(pa.field(column, pa.int64()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+def _typed(column: str, value):
+    if column in AMOUNT_COLUMNS:
+        return parse_amount(value)
+    if column in DATE_COLUMNS:
+        return parse_date(value)
+    if column in INTEGER_COLUMNS:
+        return parse_integer(value)
+    return None if value is None else str(value)
+
+def write_parquet(data_list: Iterable[Dict], filepath: str, columns: List[str] = COLUMNS,
+                  batch_rows: int = 10000) -> str:
+    """
+    Write invoice rows to a Parquet file with typed columns, batch_rows at a time,
+    so only one row group is held in memory. Requires pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(columns)
+    temp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+    batch = {column: [] for column in columns}
+    pending = 0
+
+    def flush(writer):
+        nonlocal pending
+        writer.write_table(pa.table(batch, schema=schema))
+        for values in batch.values():
+            values.clear()
+        pending = 0
+
+    try:
+        with pq.ParquetWriter(temp_path, schema) as writer:
+            for data in data_list:
+                for row in invoice_rows(data, columns):
+                    for column, value in zip(columns, row):
+                        batch[column].append(_typed(column, value))
+                    pending += 1
+                if pending >= batch_rows:
+                    flush(writer)
+            if pending:
+                flush(writer)
+        os.replace(temp_path, filepath)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    return filepath
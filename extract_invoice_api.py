@@ -1,27 +1,65 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
-from extracter_logic import extract_invoice_data, extract_simple_table_data
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException
+from extracter_logic import extract_invoice_data, parse_invoice_texts, EXTRACTOR_VERSION, LAYOUT_TEMPLATES
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 import tempfile
 import uuid
-from pdfminer.high_level import extract_text
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from worker_pool import create_executor, warm_up, queue_depth, WorkerLimitExceeded
+from result_cache import ResultCache, content_key
+from invoice_store import InvoiceStore
+from invoice_query_api import router as invoice_query_router
+from metrics_api import router as metrics_router
+from profiling_api import router as profiling_router, require_admin, save_profile
+from profiling import profiled_call
+from metrics import (
+    EXTRACTIONS, FIELD_RESULTS, QUEUE_WAIT_SECONDS, STAGE_SECONDS, counter, gauge, record_timings, timed_call
+)
+import time
+from text_cache import TextCache, extract_cached, reextract_batch
+from zip_ingest import ArchiveError, open_archive, pdf_members, read_member
+import hashlib
+from jobs import Job, JobStore
 import asyncio
+import json
 from excel_download_api import router as excel_router
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from admission import AdmissionController, AdmissionMiddleware, ADMISSION_BURST
 import os
 
-app = FastAPI(title="Amazon Invoice Extractor API", version="1.0.0")
+# Executor for extraction work (thread, process or isolated backend, see worker_pool.py)
+executor = create_executor()
+
+# PDF extracted by every worker at start-up (set WARMUP_SAMPLE to an empty value to disable)
+WARMUP_SAMPLE = os.getenv("WARMUP_SAMPLE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data", "invoice_1.pdf"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start and warm up the workers before accepting traffic
+    loop = asyncio.get_event_loop()
+    sample = WARMUP_SAMPLE if WARMUP_SAMPLE and os.path.exists(WARMUP_SAMPLE) else None
+    await loop.run_in_executor(None, warm_up, executor, sample)
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+    if invoice_store is not None:
+        invoice_store.close()
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app = FastAPI(title="Amazon Invoice Extractor API", version="1.0.0", lifespan=lifespan)
 
-# Create thread pool executor for async operations
-executor = ThreadPoolExecutor(max_workers=5)
+# Admission control: extraction requests are turned away with a 429 and Retry-After
+# while the executor queue or the upload bytes in flight are over their limits, or
+# the caller's token bucket is empty. Base cost per route, plus one token per MB.
+ADMISSION_COSTS = {
+    ("POST", "/extract-invoice"): 1,
+    ("POST", "/extract-multiple-invoices"): 2,
+    ("POST", "/extract-zip"): 5,
+    ("POST", "/extract-text"): 1,
+    ("POST", "/jobs"): 2,
+    # Re-parses the whole text cache, a full bucket
+    ("POST", "/reextract"): ADMISSION_BURST,
+}
+admission = AdmissionController(lambda: queue_depth(executor), getattr(executor, "_max_workers", 1))
+app.add_middleware(AdmissionMiddleware, controller=admission, costs=ADMISSION_COSTS)
 
 # CORS for frontend integration
 app.add_middleware(
@@ -31,122 +69,646 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include the excel download router
+# Include the excel download, invoice query, metrics and profile download routers
 app.include_router(excel_router)
+app.include_router(invoice_query_router)
+app.include_router(metrics_router)
+app.include_router(profiling_router)
+
+# Bounded cache of responses, keyed by the cache_id returned to clients. With several
+# server processes RESULT_CACHE_DIR must be shared by them, so any of them can serve
+# an export (run_api.py --production sets it)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+    disk_dir=os.getenv("RESULT_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))),
+)
+
+# The export endpoints read cached results through app.state
+app.state.result_cache = result_cache
+
+# Persistent invoice store for lookups (disabled unless INVOICE_DB_PATH is set)
+INVOICE_DB_PATH = os.getenv("INVOICE_DB_PATH", "")
+invoice_store = InvoiceStore(INVOICE_DB_PATH) if INVOICE_DB_PATH else None
+app.state.invoice_store = invoice_store
+
+# Extraction results keyed by a hash of the PDF bytes, so re-uploads skip pdfminer
+extraction_cache = ResultCache(
+    max_entries=int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "4096")),
+    ttl_seconds=float(os.getenv("EXTRACTION_CACHE_TTL", "86400")),
+    disk_dir=os.getenv("EXTRACTION_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("EXTRACTION_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024))),
+)
+
+# Compressed first-page text per PDF, so parser changes can be re-run without pdfminer
+# (disabled unless TEXT_CACHE_DIR is set; the directory is not size-limited)
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR", "")
+text_cache = TextCache(TEXT_CACHE_DIR) if TEXT_CACHE_DIR else None
+REEXTRACT_BATCH_SIZE = int(os.getenv("REEXTRACT_BATCH_SIZE", "200"))
+
+# Pre-extracted texts accepted per /extract-text request, and parsed per worker task
+TEXT_BATCH_MAX_DOCUMENTS = int(os.getenv("TEXT_BATCH_MAX_DOCUMENTS", "1000"))
+TEXT_BATCH_CHUNK_SIZE = int(os.getenv("TEXT_BATCH_CHUNK_SIZE", "50"))
+
+# Maximum number of files of one batch request extracted at the same time
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "10"))
+
+# Members of one ZIP archive decompressed and extracted at the same time
+ZIP_CONCURRENCY = int(os.getenv("ZIP_CONCURRENCY", "10"))
+
+# Background jobs (see /jobs endpoints)
+JOB_MAX_FILES = int(os.getenv("JOB_MAX_FILES", "500"))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "10"))
+# Job state is saved to JOB_DIR when set, so every server process can report on every job
+job_store = JobStore(max_jobs=int(os.getenv("JOB_MAX_JOBS", "1000")), directory=os.getenv("JOB_DIR") or None)
+
+# Uploads up to this size are extracted from memory, larger ones are spooled to disk
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(16 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-# In-memory cache for results
-result_cache = {}
+# Executor and cache metrics, read when /metrics is scraped
+EXECUTOR_IN_FLIGHT = gauge("invoice_executor_in_flight", "Tasks submitted to the extraction executor and not finished")
+gauge("invoice_executor_queue_depth", "Tasks waiting for a free extraction worker",
+      function=lambda: {(): queue_depth(executor)})
+gauge("invoice_executor_workers", "Extraction workers", function=lambda: {(): getattr(executor, "_max_workers", 0)})
+gauge("invoice_admission_inflight_bytes", "Request body bytes of admitted requests still in progress",
+      function=lambda: {(): admission.inflight_bytes})
+gauge("invoice_admission_inflight_requests", "Admitted requests still in progress",
+      function=lambda: {(): admission.inflight_requests})
+counter("invoice_admission_rejections_total", "Requests turned away with a 429", ["reason"],
+        function=lambda: {(reason,): count for reason, count in admission.rejections.items()})
 
-async def process_pdf(file_path):
+def cache_counts(field: str):
+    return lambda: {("extraction",): extraction_cache.stats()[field], ("result",): result_cache.stats()[field]}
+
+counter("invoice_cache_hits_total", "Cache lookups served from memory", ["cache"], function=cache_counts("hits"))
+counter("invoice_cache_disk_hits_total", "Cache lookups served from the disk tier", ["cache"],
+        function=cache_counts("disk_hits"))
+counter("invoice_cache_misses_total", "Cache lookups that found nothing", ["cache"], function=cache_counts("misses"))
+gauge("invoice_cache_entries", "Entries held in memory", ["cache"], function=cache_counts("entries"))
+
+# Header fields counted as found or missing for every fresh extraction
+RESULT_FIELDS = tuple(dict.fromkeys(key for template in LAYOUT_TEMPLATES for spec in template.specs for key in spec.keys))
+
+async def run_timed(fn, *args):
+    """Run fn on the executor, recording its queue wait and the stage timings it reports"""
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, extract_invoice_data, file_path)
+    submitted = time.time()
+    EXECUTOR_IN_FLIGHT.inc()
+    try:
+        result, timings, started = await loop.run_in_executor(executor, timed_call, fn, *args)
+    finally:
+        EXECUTOR_IN_FLIGHT.dec()
+    queue_wait = max(started - submitted, 0.0)
+    QUEUE_WAIT_SECONDS.observe(queue_wait)
+    admission.observe_task(time.time() - submitted - queue_wait)
+    record_timings(timings)
+    return result
+
+def record_result(result: dict):
+    """Outcome and per-field counters of one extraction"""
+    EXTRACTIONS.inc(status=result.get("status", "failed"), reason=result.get("error_reason", ""))
+    layout = result.get("layout")
+    if layout is None:
+        return
+    for field in RESULT_FIELDS:
+        FIELD_RESULTS.inc(layout=layout, field=field, outcome="found" if result.get(field) else "missing")
+
+async def process_pdf(source, filename=None, digest=None):
+    try:
+        if text_cache is not None:
+            return await run_timed(extract_cached, source, filename, TEXT_CACHE_DIR, digest)
+        return await run_timed(extract_invoice_data, source, filename)
+    except WorkerLimitExceeded as e:
+        return limit_result(e, filename)
+
+def limit_result(e: WorkerLimitExceeded, filename: str) -> dict:
+    """The worker was killed over its time budget or crashed, report the file as failed"""
+    return {"filename": filename, "status": "failed", "error": str(e), "error_reason": e.reason}
 
-async def process_text(text):
+async def profile_pdf(source, filename: str, profile: dict, with_cprofile: bool = False) -> dict:
+    """
+    Extract without the text cache, filling profile with the queue wait, the time
+    of every stage and field pattern, and with_cprofile a downloadable cProfile
+    """
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, extract_simple_table_data, text)
+    submitted = time.time()
+    try:
+        result, report, data = await loop.run_in_executor(
+            executor, profiled_call, with_cprofile, extract_invoice_data, source, filename
+        )
+    except WorkerLimitExceeded as e:
+        return limit_result(e, filename)
+    
+    record_timings(report["stages"])
+    profile["queue_wait_seconds"] = round(max(report["started"] - submitted, 0.0), 6)
+    profile.setdefault("stages", {}).update({name: round(seconds, 6) for name, seconds in report["stages"].items()})
+    profile["fields"] = {name: round(seconds, 6) for name, seconds in report["fields"].items()}
+    if data is not None:
+        profile["hot_spots"] = report["hot_spots"]
+        profile["profile_id"] = save_profile(data)
+        profile["profile_url"] = f"/profiles/{profile['profile_id']}"
+    return result
+
+async def read_upload(file: UploadFile):
+    """
+    Read an upload in chunks, hashing it on the way. Returns (digest, source),
+    where source is the PDF bytes, or the path of a temp file once the upload is
+    larger than UPLOAD_SPOOL_MAX_BYTES. The caller removes that temp file.
+    """
+    hasher = hashlib.sha256()
+    chunks = []
+    size = 0
+    spool = None
+    started = time.perf_counter()
+    spool_seconds = 0.0
+    
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+            
+            if spool is None and size > UPLOAD_SPOOL_MAX_BYTES:
+                spool = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+                spool.writelines(chunks)
+                chunks = None
+            
+            if spool is not None:
+                write_started = time.perf_counter()
+                spool.write(chunk)
+                spool_seconds += time.perf_counter() - write_started
+            else:
+                chunks.append(chunk)
+    except:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+    
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage="upload_read")
+    if spool is not None:
+        spool.close()
+        STAGE_SECONDS.observe(spool_seconds, stage="temp_write")
+        return hasher.hexdigest(), spool.name
+    return hasher.hexdigest(), b"".join(chunks)
+
+async def extract_source(source, digest: str, filename: str, profile: dict = None,
+                         with_cprofile: bool = False) -> dict:
+    """
+    Extract invoice data from PDF bytes or a path, served from the cache when possible.
+    Given a profile dict, the caches are bypassed and the timing breakdown is written into it.
+    """
+    cache_key = content_key(digest, EXTRACTOR_VERSION)
+    if profile is None:
+        result = extraction_cache.get(cache_key)
+        if result is not None:
+            result["filename"] = filename
+            return result
+    
+    # Process invoice data asynchronously
+    if profile is None:
+        result = await process_pdf(source, filename, digest)
+    else:
+        result = await profile_pdf(source, filename, profile, with_cprofile)
+    record_result(result)
+    
+    # Only deterministic outcomes are cached and stored, not PDF read errors
+    if "error" not in result:
+        await extraction_cache.set_async(cache_key, result)
+        if invoice_store is not None:
+            invoice_store.add(result, digest)
+    
+    return result
+
+async def extract_upload(file: UploadFile, profile: dict = None, with_cprofile: bool = False) -> dict:
+    """Extract invoice data from an uploaded PDF without writing it to disk"""
+    started = time.perf_counter()
+    digest, source = await read_upload(file)
+    if profile is not None:
+        profile["stages"] = {"upload_read": round(time.perf_counter() - started, 6)}
+    try:
+        return await extract_source(source, digest, file.filename, profile, with_cprofile)
+    finally:
+        discard_source(source)
+
+def discard_source(source):
+    """Remove the spool file of a large upload, if there is one"""
+    if isinstance(source, str):
+        try:
+            os.unlink(source)
+        except OSError:
+            pass
+
+async def process_upload(file: UploadFile, semaphore: asyncio.Semaphore) -> dict:
+    """Extract one file of a batch, reporting failures as a result entry"""
+    # Validate file type
+    if not file.filename.lower().endswith('.pdf'):
+        return {
+            "filename": file.filename,
+            "status": "failed",
+            "error": "Only PDF files are allowed"
+        }
+    
+    async with semaphore:
+        try:
+            result = await extract_upload(file)
+            result["original_filename"] = file.filename
+            return result
+        
+        except Exception as e:
+            return {
+                "filename": file.filename,
+                "status": "failed",
+                "error": str(e)
+            }
+
+async def run_job(job: Job, uploads: list):
+    """Process the files of a job in the background, JOB_CONCURRENCY at a time"""
+    semaphore = asyncio.Semaphore(JOB_CONCURRENCY)
+    
+    async def run_file(index: int, upload):
+        filename = job.files[index]["filename"]
+        async with semaphore:
+            job.start_file(index)
+            if upload is None:
+                result = {
+                    "filename": filename,
+                    "status": "failed",
+                    "error": "Only PDF files are allowed"
+                }
+            else:
+                digest, source = upload
+                try:
+                    result = await extract_source(source, digest, filename)
+                    result["original_filename"] = filename
+                except Exception as e:
+                    result = {
+                        "filename": filename,
+                        "status": "failed",
+                        "error": str(e)
+                    }
+                finally:
+                    discard_source(source)
+            job.finish_file(index, result)
+    
+    try:
+        await asyncio.gather(*(run_file(i, upload) for i, upload in enumerate(uploads)))
+    finally:
+        # Results are available under the job id, like a batch cache_id
+        await result_cache.set_async(job.id, job.results)
+        job.finish()
+
+async def process_texts(documents):
+    """Parse [(text, filename), ...] in chunks of TEXT_BATCH_CHUNK_SIZE across the executor"""
+    chunks = [documents[i:i + TEXT_BATCH_CHUNK_SIZE] for i in range(0, len(documents), TEXT_BATCH_CHUNK_SIZE)]
+    parsed = await asyncio.gather(*(run_timed(parse_invoice_texts, chunk) for chunk in chunks))
+    return [result for chunk in parsed for result in chunk]
 
 @app.post("/extract-invoice")
-@limiter.limit("10/minute")
-async def extract_invoice(request: Request, file: UploadFile = File(...)):
-    """Extract data from a single invoice PDF"""
+async def extract_invoice(file: UploadFile = File(...), profile: bool = False,
+                          cprofile: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Extract data from a single invoice PDF.
+    Admins can add profile=true (with the X-Admin-Token header) to bypass the caches
+    and get a timing breakdown per stage and field pattern; cprofile=true also
+    captures a cProfile of the extraction, downloadable from /profiles/{profile_id}.
+    """
+    if profile or cprofile:
+        require_admin(x_admin_token)
+    
     try:
         # Validate file type
         if not file.filename.lower().endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Save uploaded file to temp location
-        file_ext = file.filename.split(".")[-1]
-        temp_path = f"{tempfile.gettempdir()}/{uuid.uuid4()}.{file_ext}"
-        
-        with open(temp_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
         # Process invoice data asynchronously
-        result = await process_pdf(temp_path)
-        
-        # Clean up temp file
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+        started = time.perf_counter()
+        breakdown = {} if profile or cprofile else None
+        result = await extract_upload(file, breakdown, cprofile)
         
         # Cache result
         cache_id = str(uuid.uuid4())
-        result_cache[cache_id] = result
+        await result_cache.set_async(cache_id, result)
         
+        if breakdown is not None:
+            breakdown["total_seconds"] = round(time.perf_counter() - started, 6)
+            return {"cache_id": cache_id, "result": result, "profile": breakdown}
         return {"cache_id": cache_id, "result": result}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 @app.post("/extract-multiple-invoices")
-@limiter.limit("5/minute")
-async def extract_multiple_invoices(request: Request, files: List[UploadFile] = File(...)):
-    """Extract data from multiple invoice PDFs"""
+async def extract_multiple_invoices(files: List[UploadFile] = File(...), stream: bool = False):
+    """
+    Extract data from multiple invoice PDFs.
+    With stream=true the response is NDJSON: one record per invoice as soon as it
+    is done, in completion order with its input index, then a summary record.
+    """
     try:
         if len(files) > 10:  # Limit to 10 files at once
             raise HTTPException(status_code=400, detail="Maximum 10 files allowed at once")
         
-        results = []
+        if stream:
+            return StreamingResponse(stream_multiple_invoices(files), media_type="application/x-ndjson")
         
-        for file in files:
-            # Validate file type
-            if not file.filename.lower().endswith('.pdf'):
-                results.append({
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": "Only PDF files are allowed"
-                })
-                continue
-            
-            try:
-                # Save uploaded file to temp location
-                file_ext = file.filename.split(".")[-1]
-                temp_path = f"{tempfile.gettempdir()}/{uuid.uuid4()}.{file_ext}"
-                
-                with open(temp_path, "wb") as f:
-                    content = await file.read()
-                    f.write(content)
-                
-                # Process invoice data asynchronously
-                result = await process_pdf(temp_path)
-                result["original_filename"] = file.filename
-                results.append(result)
-                
-                # Clean up temp file
-                try:
-                    os.unlink(temp_path)
-                except:
-                    pass
-                    
-            except Exception as e:
-                results.append({
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": str(e)
-                })
+        # Read and dispatch all files at once, at most BATCH_CONCURRENCY in flight
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        results = await asyncio.gather(*(process_upload(file, semaphore) for file in files))
         
         # Cache results
         cache_id = str(uuid.uuid4())
-        result_cache[cache_id] = results
+        await result_cache.set_async(cache_id, results)
         
-        return {
-            "cache_id": cache_id, 
-            "results": results,
-            "total_processed": len(results),
-            "successful": len([r for r in results if r.get("status") == "success"]),
-            "failed": len([r for r in results if r.get("status") == "failed"])
-        }
+        return {"cache_id": cache_id, "results": results, **count_results(results)}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
+def count_results(results) -> dict:
+    """Processed, successful and failed counts in one pass"""
+    counts = {"total_processed": 0, "successful": 0, "failed": 0}
+    for result in results:
+        counts["total_processed"] += 1
+        if result.get("status") == "success":
+            counts["successful"] += 1
+        elif result.get("status") == "failed":
+            counts["failed"] += 1
+    return counts
+
+async def stream_multiple_invoices(files: List[UploadFile]):
+    """NDJSON records for a batch, written as each invoice finishes"""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def indexed(index: int, file: UploadFile):
+        return index, await process_upload(file, semaphore)
+    
+    results = [None] * len(files)
+    tasks = [asyncio.ensure_future(indexed(i, file)) for i, file in enumerate(files)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result = await next_done
+            results[index] = result
+            yield json.dumps({"type": "result", "index": index, "result": result}, ensure_ascii=False) + "\n"
+    finally:
+        # Client went away: stop the remaining extractions
+        for task in tasks:
+            task.cancel()
+    
+    cache_id = str(uuid.uuid4())
+    await result_cache.set_async(cache_id, results)
+    yield json.dumps({"type": "summary", "cache_id": cache_id, **count_results(results)}) + "\n"
+
+@app.post("/extract-zip")
+async def extract_zip(file: UploadFile = File(...)):
+    """
+    Extract every PDF in a ZIP archive. Members are decompressed one at a time
+    as extraction slots free up, so memory is bounded by ZIP_CONCURRENCY members
+    rather than the archive size. The response is NDJSON: one record per PDF in
+    completion order with its index and member path, then a summary record.
+    """
+    if not file.filename.lower().endswith('.zip'):
+        raise HTTPException(status_code=400, detail="Only ZIP archives are allowed")
+    
+    # The upload is spooled to disk by the server, the archive is read from there
+    try:
+        archive = open_archive(file.file)
+        members = pdf_members(archive)
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not members:
+        archive.close()
+        raise HTTPException(status_code=400, detail="No PDF files found in the archive")
+    
+    return StreamingResponse(stream_zip_invoices(archive, members), media_type="application/x-ndjson")
+
+async def stream_zip_invoices(archive, members):
+    """NDJSON records for the PDFs of an archive, written as each invoice finishes"""
+    loop = asyncio.get_event_loop()
+    slots = asyncio.Semaphore(ZIP_CONCURRENCY)
+    finished = asyncio.Queue()
+    tasks = []
+    
+    async def extract_member(index: int, name: str, digest: str, source):
+        try:
+            result = await extract_source(source, digest, name)
+        except Exception as e:
+            result = {"filename": name, "status": "failed", "error": str(e)}
+        finally:
+            discard_source(source)
+            slots.release()
+        await finished.put((index, result))
+    
+    async def feed():
+        # A member is only decompressed once a slot is free
+        for index, info in enumerate(members):
+            await slots.acquire()
+            try:
+                digest, source = await loop.run_in_executor(None, read_member, archive, info, UPLOAD_SPOOL_MAX_BYTES)
+            except Exception as e:
+                slots.release()
+                await finished.put((index, {"filename": info.filename, "status": "failed",
+                                            "error": f"Could not read archive member: {str(e)}"}))
+                continue
+            tasks.append(asyncio.ensure_future(extract_member(index, info.filename, digest, source)))
+    
+    results = [None] * len(members)
+    feeder = asyncio.ensure_future(feed())
+    try:
+        for _ in members:
+            index, result = await finished.get()
+            results[index] = result
+            yield json.dumps({"type": "result", "index": index, "filename": members[index].filename,
+                              "result": result}, ensure_ascii=False) + "\n"
+        await feeder
+    finally:
+        # Client went away: stop reading the archive and the remaining extractions
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
+        archive.close()
+    
+    cache_id = str(uuid.uuid4())
+    await result_cache.set_async(cache_id, results)
+    yield json.dumps({"type": "summary", "cache_id": cache_id, **count_results(results)}) + "\n"
+
+@app.post("/extract-text")
+async def extract_text_batch(data: dict):
+    """
+    Extract invoice data from already extracted first-page texts, e.g. OCR output.
+    Body: {"documents": [{"filename": "...", "text": "..."}, ...]}
+    """
+    documents = data.get("documents")
+    if not isinstance(documents, list) or not documents:
+        raise HTTPException(status_code=400, detail="No documents provided")
+    if len(documents) > TEXT_BATCH_MAX_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"Maximum {TEXT_BATCH_MAX_DOCUMENTS} documents allowed at once")
+    
+    texts = []
+    for index, document in enumerate(documents):
+        if not isinstance(document, dict) or not isinstance(document.get("text"), str):
+            raise HTTPException(status_code=400, detail=f"Document {index} has no text")
+        texts.append((document["text"], document.get("filename") or f"document_{index}"))
+    
+    try:
+        results = await process_texts(texts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+    
+    # Cache results, exportable like a PDF batch
+    cache_id = str(uuid.uuid4())
+    await result_cache.set_async(cache_id, results)
+    
+    return {"cache_id": cache_id, "results": results, **count_results(results)}
+
+@app.post("/jobs", status_code=202)
+async def submit_job(files: List[UploadFile] = File(...)):
+    """Submit invoice PDFs for background extraction, returns a job id immediately"""
+    if len(files) > JOB_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Maximum {JOB_MAX_FILES} files allowed per job")
+    
+    # Uploads are closed when the request ends, so read them before returning
+    uploads = []
+    try:
+        for file in files:
+            if file.filename.lower().endswith('.pdf'):
+                uploads.append(await read_upload(file))
+            else:
+                uploads.append(None)
+    except Exception as e:
+        for upload in uploads:
+            if upload is not None:
+                discard_source(upload[1])
+        raise HTTPException(status_code=500, detail=f"Upload error: {str(e)}")
+    
+    job = job_store.create([file.filename for file in files])
+    job.task = asyncio.create_task(run_job(job, uploads))
+    
+    return {
+        "job_id": job.id,
+        "total": job.total,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+        "results_url": f"/jobs/{job.id}/results"
+    }
+
+def get_job(job_id: str) -> Job:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Progress of a job with the status of every file"""
+    return get_job(job_id).summary()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: a "file" event per status change, then a "completed" event"""
+    job = get_job(job_id)
+    
+    async def stream():
+        position = 0
+        while True:
+            # Replay every status change since the last one sent
+            while position < len(job.log):
+                index = job.log[position]
+                position += 1
+                if index >= 0:
+                    yield f"event: file\ndata: {json.dumps(job.file_event(index))}\n\n"
+            
+            if job.status == "completed":
+                yield f"event: completed\ndata: {json.dumps(job.progress())}\n\n"
+                return
+            
+            if not await job.wait_for_change(position, timeout=15):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/{job_id}/results")
+def job_results(job_id: str):
+    """Results of a completed job, in the same shape as /extract-multiple-invoices"""
+    job = get_job(job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}, {job.done} of {job.total} files done")
+    
+    return {
+        "cache_id": job.id,
+        "results": job.results,
+        "total_processed": job.total,
+        "successful": job.successful,
+        "failed": job.failed
+    }
+
+@app.post("/reextract")
+async def reextract(x_admin_token: Optional[str] = Header(None)):
+    """
+    Re-run the field and table parsers over every cached PDF text, without pdfminer.
+    Refreshes the extraction cache and the invoice store, and streams NDJSON:
+    one record per invoice, then a summary record. Admins only.
+    """
+    require_admin(x_admin_token)
+    if text_cache is None:
+        raise HTTPException(status_code=503, detail="Text cache is disabled (set TEXT_CACHE_DIR)")
+    
+    return StreamingResponse(stream_reextract(), media_type="application/x-ndjson")
+
+async def stream_reextract():
+    max_in_flight = getattr(executor, "_max_workers", 1) * 2
+    pending = []
+    counts = {"total_processed": 0, "successful": 0, "failed": 0, "skipped": 0}
+    
+    async def results_of(batch_results):
+        for digest, result in batch_results:
+            if result is None:
+                # Text cached before the table lines were, only a new upload refreshes it
+                counts["skipped"] += 1
+                yield json.dumps({"type": "skipped", "digest": digest,
+                                  "reason": "Cached text is out of date, upload the PDF again"}) + "\n"
+                continue
+            await extraction_cache.set_async(content_key(digest, EXTRACTOR_VERSION), result)
+            if invoice_store is not None:
+                invoice_store.add(result, digest)
+            counts["total_processed"] += 1
+            counts["successful" if result.get("status") == "success" else "failed"] += 1
+            yield json.dumps({"type": "result", "digest": digest, "result": result}, ensure_ascii=False) + "\n"
+    
+    try:
+        # Keep every worker busy with a batch queued behind it, in digest order
+        for batch in text_cache.digest_batches(REEXTRACT_BATCH_SIZE):
+            pending.append(asyncio.ensure_future(run_timed(reextract_batch, TEXT_CACHE_DIR, batch)))
+            if len(pending) >= max_in_flight:
+                async for line in results_of(await pending.pop(0)):
+                    yield line
+        while pending:
+            async for line in results_of(await pending.pop(0)):
+                yield line
+    finally:
+        for future in pending:
+            future.cancel()
+    
+    yield json.dumps({"type": "summary", "extractor_version": EXTRACTOR_VERSION, **counts}) + "\n"
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Amazon Invoice Extractor API is running"}
 
+@app.get("/cache-stats")
+def cache_stats():
+    """Hit/miss counters and sizes of the result caches"""
+    return {
+        "extraction_cache": extraction_cache.stats(),
+        "result_cache": result_cache.stats()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
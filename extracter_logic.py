@@ -1,122 +1,394 @@
 import re
+import io
 import json
 import os
-from pdfminer.high_level import extract_text
+import time
+import bisect
+import threading
+from contextlib import closing
+from typing import Callable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTContainer, LTPage, LTText, LTTextBox
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.psparser import PSLiteral
+from pdfminer.utils import open_filename
+from layout_table import extract_layout_table, page_lines, table_continues
+from metrics import field_timings, stage
 
-def extract_invoice_data(pdf_path: str) -> dict:
+# Bump whenever a change to the extraction logic changes its output,
+# so cached results from the previous version are not served
+EXTRACTOR_VERSION = "1.2.1"
+
+def source_name(source) -> str:
+    """File name of a PDF source, if it has one"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    name = getattr(source, "name", None)
+    return os.path.basename(name) if isinstance(name, str) else None
+
+def extract_invoice_data(source, filename: str = None) -> dict:
     """
-    Extract invoice data from PDF (first page only) and return as dictionary
+    Extract invoice data from PDF and return as dictionary. Header fields come
+    from the first page, line items from every page the item table spans.
+    source is a file path, the PDF bytes or a binary file-like object;
+    filename overrides the name reported in the result.
     """
     try:
-        # Extract text from first page only
-        text = extract_text(pdf_path, page_numbers=[0])
+        with stage("pdf_parse"):
+            text, lines = extract_pdf_content(source)
     except Exception as e:
-        return {"error": f"PDF extraction failed: {str(e)}", "status": "failed"}
+        return extraction_error(e)
 
-    # Simple, direct patterns based on the exact text format
-    result = {}
+    return parse_invoice_text(text, filename or source_name(source), lines)
+
+# pdfminer pipeline used for the page text:
+#   direct      - drives the page interpreter with a per-worker pipeline (default)
+#   high_level  - pdfminer's extract_text, one fresh pipeline per document
+# Both produce the same text and layout
+PDF_BACKENDS = ("direct", "high_level")
+PDF_BACKEND = os.getenv("PDF_BACKEND", "direct")
+
+def extract_page_text(source, backend: str = None) -> str:
+    """First-page text of a PDF given as a path, bytes or binary file-like object"""
+    return extract_pdf_content(source, backend, table=False)[0]
+
+def extract_pdf_content(source, backend: str = None, table: bool = True) -> Tuple[str, list]:
+    """
+    First-page text of a PDF, and the page_lines() of every page the line-item
+    table spans (see layout_table.py). Pages after the table's TOTAL row are not read.
+    """
+    # pdfminer reads bytes through a file-like object, no temp file needed
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    backend = backend or PDF_BACKEND
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{backend}', expected one of {PDF_BACKENDS}")
+
+    text = None
+    if backend == "high_level":
+        from pdfminer.high_level import extract_pages, extract_text
+        start = source.tell() if hasattr(source, "tell") else None
+        # Extract text from first page only
+        text = extract_text(source, page_numbers=[0])
+        if not table:
+            return text, []
+        if start is not None:
+            source.seek(start)
+        layouts = extract_pages(source, laparams=_LAPARAMS)
+    else:
+        layouts = page_layouts(source)
+
+    lines = []
+    with closing(layouts):
+        open_table = False
+        for ltpage in layouts:
+            if text is None:
+                text = layout_text(ltpage)
+            if not table:
+                break
+            lines.append(page_lines(ltpage))
+            open_table = table_continues(lines[-1], open_table)
+            if not open_table:
+                break
+
+    return text or "", lines
+
+class _TextPageAggregator(PDFPageAggregator):
+    """Layout aggregator that, like pdfminer's TextConverter, drops paths and images"""
+    def render_image(self, name, stream):
+        pass
+
+    def paint_path(self, gstate, stroke, fill, evenodd, path):
+        pass
+
+class _WorkerResourceManager(PDFResourceManager):
+    """
+    Resource manager kept for the life of a worker. pdfminer caches fonts by object
+    id, which is only unique within one document (the subset fonts embedded in
+    every invoice reuse the same ids), so that cache is reset per document. Fonts
+    described by nothing but literal names, i.e. the standard 14 fonts, are shared
+    across documents.
+    """
+    def __init__(self):
+        super().__init__(caching=True)
+        self._shared_fonts = {}
+
+    def start_document(self):
+        self._cached_fonts.clear()
+
+    def get_font(self, objid, spec):
+        if not all(isinstance(value, PSLiteral) for value in spec.values()):
+            return super().get_font(objid, spec)
+        key = tuple(sorted((name, value.name) for name, value in spec.items()))
+        font = self._shared_fonts.get(key)
+        if font is None:
+            font = self._shared_fonts[key] = super().get_font(None, spec)
+        return font
+
+# Defaults of extract_text; the text parsers depend on the lines and boxes they produce
+_LAPARAMS = LAParams()
+
+# Devices and interpreters hold per-page state, so each worker thread gets its own
+_pipelines = threading.local()
+
+def _pipeline() -> tuple:
+    pipeline = getattr(_pipelines, "pipeline", None)
+    if pipeline is None:
+        rsrcmgr = _WorkerResourceManager()
+        device = _TextPageAggregator(rsrcmgr, laparams=_LAPARAMS)
+        pipeline = _pipelines.pipeline = (rsrcmgr, device, PDFPageInterpreter(rsrcmgr, device))
+    return pipeline
+
+def page_layouts(source) -> Iterator[LTPage]:
+    """
+    Analysed layout of each page in turn. Pages are interpreted as they are
+    consumed, so a caller that stops after page 1 never touches the rest.
+    """
+    rsrcmgr, device, interpreter = _pipeline()
+    try:
+        with open_filename(source, "rb") as fp:
+            document = PDFDocument(PDFParser(fp))
+            rsrcmgr.start_document()
+            for page in PDFPage.create_pages(document):
+                interpreter.process_page(page)
+                yield device.get_result()
+    except Exception:
+        # An error inside a page (e.g. within a form XObject) leaves the device
+        # mid-page with containers on its stack; build a fresh pipeline next time
+        _pipelines.pipeline = None
+        raise
+
+def layout_text(ltpage: LTPage) -> str:
+    """Text of a page in the order and format pdfminer's TextConverter writes it"""
+    parts = []
+
+    def render(item):
+        if isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            parts.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            parts.append("\n")
+
+    render(ltpage)
+    parts.append("\f")
+    return "".join(parts)
+
+def extraction_error(e: Exception) -> dict:
+    """Result for a PDF that pdfminer could not read"""
+    if isinstance(e, MemoryError):
+        # Raised in an isolated worker once the PDF exceeds EXTRACTION_MEMORY_LIMIT_MB
+        return {"error": "PDF extraction exceeded the memory limit", "status": "failed",
+                "error_reason": "memory_limit"}
+    return {"error": f"PDF extraction failed: {str(e)}", "status": "failed", "error_reason": "pdf_error"}
+
+def parse_invoice_text(text: str, filename: str = None, lines: list = None) -> dict:
+    """
+    Extract invoice fields and table data from the first-page text of an invoice.
+    lines are the page_lines() of the table pages, when the PDF layout is available.
+    """
+    with stage("field_extraction"):
+        template = classify_layout(text)
+        result = extract_fields(text, template)
     
-    # Order Number: 407-2126009-5587507
-    order_match = re.search(r'Order Number:(\d{3}-\d{7}-\d{7})', text)
-    result["order_number"] = order_match.group(1) if order_match else None
+    # Line items from the positioned layout, or from the text alone
+    with stage("table_extraction"):
+        table_data = extract_layout_table(lines) if lines else None
+        if table_data is None:
+            table_data = extract_simple_table_data(text)
+    result.update(table_data)
     
-    # Order Date: 10.06.2025
-    order_date_match = re.search(r'Order Date:(\d{2}\.\d{2}\.\d{4})', text)
-    result["order_date"] = order_date_match.group(1) if order_date_match else None
+    # Add filename and status
+    result["filename"] = filename
+    result["status"] = "success" if result.get("invoice_number") else "failed"
+    result["layout"] = template.name
     
+    return result
+
+def parse_invoice_texts(documents: List[Tuple[str, str]]) -> List[dict]:
+    """parse_invoice_text over [(text, filename), ...], run as one worker task"""
+    return [parse_invoice_text(text, filename) for text, filename in documents]
+
+class FieldSpec(NamedTuple):
+    """
+    One labelled value in the invoice text.
+    keys   - result keys filled by this spec
+    label  - label text, every label of a layout is located by a single scan
+    value  - pattern matched right after the label, or right before it when before=True
+    until  - instead of value, take everything up to the next occurrence of this label
+    post   - turns the match (or the sliced block) into one value per key
+    """
+    keys: Tuple[str, ...]
+    label: str
+    post: Callable
+    value: Pattern = None
+    until: str = None
+    before: bool = False
+
+def _group(match) -> tuple:
+    return (match.group(1),)
+
+def _rupees(match) -> tuple:
+    return (f"₹{match.group(1)}",)
+
+def _squash(block: str) -> tuple:
+    # Collapse whitespace runs, same as stripping and re.sub(r'\s+', ' ')
+    return (' '.join(block.split()),)
+
+def _seller(match) -> tuple:
+    # First line is the seller name, remaining lines form the seller address
+    seller_lines = [line.strip() for line in match.group(1).strip().split('\n') if line.strip()]
+    if not seller_lines:
+        return (None, None)
+    return (seller_lines[0], ' '.join(seller_lines[1:]) if len(seller_lines) > 1 else None)
+
+_SELLER_BLOCK = re.compile(r'\s*(.*?)(?:\s*IN|\s*\*)', re.DOTALL | re.IGNORECASE)
+
+# Field table, in the order the keys appear in the result
+FIELD_SPECS = (
+    # Order Number: 407-2126009-5587507
+    FieldSpec(("order_number",), "Order Number:", _group, re.compile(r'(\d{3}-\d{7}-\d{7})')),
+    # Order Date: 10.06.2025
+    FieldSpec(("order_date",), "Order Date:", _group, re.compile(r'(\d{2}\.\d{2}\.\d{4})')),
     # Invoice Number: BOM7-556301
-    invoice_match = re.search(r'Invoice Number :([A-Z0-9]+-[A-Z0-9]+)', text)
-    result["invoice_number"] = invoice_match.group(1) if invoice_match else None
-    
+    FieldSpec(("invoice_number",), "Invoice Number :", _group, re.compile(r'([A-Z0-9]+-[A-Z0-9]+)')),
     # Invoice Details: MH-BOM7-1931441115-2526
-    invoice_details_match = re.search(r'Invoice Details :([A-Z]{2}-[A-Z0-9]+-\d+-\d+|[A-Z0-9-]+)', text)
-    result["invoice_details"] = invoice_details_match.group(1) if invoice_details_match else None
-    
+    FieldSpec(("invoice_details",), "Invoice Details :", _group,
+              re.compile(r'([A-Z]{2}-[A-Z0-9]+-\d+-\d+|[A-Z0-9-]+)')),
     # Invoice Date: 10.06.2025
-    invoice_date_match = re.search(r'Invoice Date :(\d{2}\.\d{2}\.\d{4})', text)
-    result["invoice_date"] = invoice_date_match.group(1) if invoice_date_match else None
-    
+    FieldSpec(("invoice_date",), "Invoice Date :", _group, re.compile(r'(\d{2}\.\d{2}\.\d{4})')),
     # GST Registration No: 27AALCR3173P1ZN
-    gst_match = re.search(r'GST Registration No:([A-Z0-9]{15})', text)
-    result["gst_registration_no"] = gst_match.group(1) if gst_match else None
-    
+    FieldSpec(("gst_registration_no",), "GST Registration No:", _group, re.compile(r'([A-Z0-9]{15})')),
     # State/UT Code: 27
-    state_match = re.search(r'State/UT Code:(\d{2})', text)
-    result["state_ut_code"] = state_match.group(1) if state_match else None
-    
+    FieldSpec(("state_ut_code",), "State/UT Code:", _group, re.compile(r'(\d{2})')),
     # Place of supply: MAHARASHTRA
-    supply_match = re.search(r'Place of supply:([A-Z]+)', text)
-    result["place_of_supply"] = supply_match.group(1) if supply_match else None
-    
+    FieldSpec(("place_of_supply",), "Place of supply:", _group, re.compile(r'([A-Z]+)')),
     # Place of delivery: MAHARASHTRA
-    delivery_match = re.search(r'Place of delivery:([A-Z]+)', text)
-    result["place_of_delivery"] = delivery_match.group(1) if delivery_match else None
-    
-    # Updated Seller Name and Address extraction
-    # Extract everything after "Sold By :" until "IN" or "*"
-    seller_section_match = re.search(r'Sold By :\s*(.*?)(?:\s*IN|\s*\*)', text, re.DOTALL | re.IGNORECASE)
-    if seller_section_match:
-        seller_section = seller_section_match.group(1).strip()
-        # Clean up whitespace and split into lines
-        seller_lines = [line.strip() for line in seller_section.split('\n') if line.strip()]
-        
-        if seller_lines:
-            # First line is the seller name
-            result["seller_name"] = seller_lines[0]
-            # Remaining lines form the seller address
-            if len(seller_lines) > 1:
-                result["seller_address"] = ' '.join(seller_lines[1:])
-            else:
-                result["seller_address"] = None
+    FieldSpec(("place_of_delivery",), "Place of delivery:", _group, re.compile(r'([A-Z]+)')),
+    # Seller name and address: everything after "Sold By :" until "IN" or "*"
+    FieldSpec(("seller_name", "seller_address"), "Sold By :", _seller, _SELLER_BLOCK),
+    # Billing Address: After "Billing Address :" until "State/UT Code"
+    FieldSpec(("billing_address",), "Billing Address :", _squash, until="State/UT Code:"),
+    # Shipping Address: After "Shipping Address :" until "State/UT Code"
+    FieldSpec(("shipping_address",), "Shipping Address :", _squash, until="State/UT Code:"),
+    # Total Amount: ₹764.00 right before "Amount in Words"
+    FieldSpec(("total_amount",), "Amount in Words:", _rupees, re.compile(r'₹(\d+\.\d{2})\s*'),
+              before=True),
+)
+
+def _flexible_label(label: str) -> str:
+    """Pattern for a label with any spacing between its words and around the colon"""
+    return r'\s*'.join(re.escape(part) for part in re.findall(r'[^\s:]+|:', label)) + r'\s*'
+
+class LayoutTemplate:
+    """
+    Field specs for one invoice layout, with the label scan compiled once.
+    anchors  - literal strings that all appear in invoices of this layout
+    flexible - match labels case-insensitively and with any spacing; slower,
+               meant for the catch-all template of documents no anchors match
+    """
+    def __init__(self, name: str, anchors: Tuple[str, ...], specs: Tuple[FieldSpec, ...],
+                 flexible: bool = False):
+        self.name = name
+        self.anchors = anchors
+        self.specs = specs
+        self.flexible = flexible
+        self.labels = tuple(dict.fromkeys(
+            label for spec in specs for label in (spec.label, spec.until) if label
+        ))
+        if flexible:
+            # One group per label, so a match maps back to its label by group number
+            self._scan = re.compile('|'.join(f'({_flexible_label(label)})' for label in self.labels),
+                                    re.IGNORECASE)
         else:
-            result["seller_name"] = None
-            result["seller_address"] = None
-    else:
-        # Fallback to original logic if the new pattern doesn't match
-        seller_match = re.search(r'Sold By :\s*([A-Za-z][A-Za-z\s&.,()]+?)(?:\s*\*|\s*IN)', text)
-        result["seller_name"] = seller_match.group(1).strip() if seller_match else None
+            # One alternation of literal labels; plain literals keep re's fast prefix scan
+            self._scan = re.compile('|'.join(re.escape(label) for label in self.labels))
+
+    def matches(self, text: str) -> bool:
+        return all(anchor in text for anchor in self.anchors)
+
+    def scan(self, text: str) -> dict:
+        """Locate every label in one pass: label -> [(start, end), ...] in text order"""
+        positions = {}
+        if self.flexible:
+            for match in self._scan.finditer(text):
+                positions.setdefault(self.labels[match.lastindex - 1], []).append(match.span())
+        else:
+            for match in self._scan.finditer(text):
+                positions.setdefault(match.group(), []).append(match.span())
+        return positions
+
+# Layouts tried in order, the first whose anchors all appear is used. Add new
+# Amazon layouts above the catch-all with their own label spellings; checking
+# anchors costs a few substring searches, so existing layouts do not slow down.
+LAYOUT_TEMPLATES = (
+    # Amazon India tax invoice, exact label spellings
+    LayoutTemplate("amazon_in", ("Order Number:", "Invoice Number :", "Sold By :"), FIELD_SPECS),
+    # Anything else: same fields, labels in any case and spacing
+    LayoutTemplate("generic", (), FIELD_SPECS, flexible=True),
+)
+
+def classify_layout(text: str) -> LayoutTemplate:
+    """Template for the layout of an invoice text"""
+    for template in LAYOUT_TEMPLATES:
+        if template.matches(text):
+            return template
+    return LAYOUT_TEMPLATES[-1]
+
+def _spec_value(spec: FieldSpec, text: str, spans: list, positions: dict) -> Optional[tuple]:
+    """Value of a spec at the first label occurrence where it matches"""
+    for start, end in spans:
+        if spec.until:
+            # Block runs to the next terminator label after this one
+            stops = positions.get(spec.until, ())
+            index = bisect.bisect_left(stops, (end, end))
+            if index == len(stops):
+                return None
+            return spec.post(text[end:stops[index][0]])
         
-        # Seller Address: Everything after * until PAN No
-        seller_addr_match = re.search(r'(?:\*|IN)\s*(.*?)\s*PAN No:', text, re.DOTALL)
-        if seller_addr_match:
-            addr = seller_addr_match.group(1).strip()
-            addr = re.sub(r'\s+', ' ', addr)  # Clean whitespace
-            result["seller_address"] = addr
+        if spec.before:
+            # Value sits right in front of the label, e.g. "₹764.00Amount in Words:"
+            value_start = text.rfind('₹', 0, start)
+            match = spec.value.fullmatch(text, value_start, start) if value_start != -1 else None
         else:
-            result["seller_address"] = None
-    
-    # Billing Address: After "Billing Address :" until "State/UT Code"
-    billing_match = re.search(r'Billing Address :\s*(.*?)\s*State/UT Code:', text, re.DOTALL)
-    if billing_match:
-        addr = billing_match.group(1).strip()
-        addr = re.sub(r'\s+', ' ', addr)
-        result["billing_address"] = addr
-    else:
-        result["billing_address"] = None
-    
-    # Shipping Address: After "Shipping Address :" until "State/UT Code"
-    shipping_match = re.search(r'Shipping Address :\s*(.*?)\s*State/UT Code:', text, re.DOTALL)
-    if shipping_match:
-        addr = shipping_match.group(1).strip()
-        addr = re.sub(r'\s+', ' ', addr)
-        result["shipping_address"] = addr
-    else:
-        result["shipping_address"] = None
-    
-    # Total Amount: Find ₹764.00 (before "Amount in Words")
-    total_match = re.search(r'₹(\d+\.\d{2})\s*Amount in Words:', text)
-    result["total_amount"] = f"₹{total_match.group(1)}" if total_match else None
-    
-    # Extract table data
-    table_data = extract_simple_table_data(text)
-    result.update(table_data)
+            match = spec.value.match(text, end)
+        if match:
+            return spec.post(match)
+    return None
+
+def extract_fields(text: str, template: LayoutTemplate = None) -> dict:
+    """Extract the labelled header fields with a single scan over the text"""
+    template = template or classify_layout(text)
+    # Seconds per field pattern, only when the extraction is being profiled
+    timings = field_timings()
+    if timings is not None:
+        start = time.perf_counter()
+    positions = template.scan(text)
+    if timings is not None:
+        timings["label_scan"] = time.perf_counter() - start
+    result = {}
     
-    # Add filename and status
-    result["filename"] = os.path.basename(pdf_path)
-    result["status"] = "success" if result.get("invoice_number") else "failed"
+    for spec in template.specs:
+        if timings is not None:
+            start = time.perf_counter()
+        values = _spec_value(spec, text, positions.get(spec.label, ()), positions)
+        if values is None:
+            values = (None,) * len(spec.keys)
+        result.update(zip(spec.keys, values))
+        if timings is not None:
+            timings[",".join(spec.keys)] = time.perf_counter() - start
     
     return result
 
+_TABLE_START = re.compile(r'\d+\s+')
+_AMOUNT = re.compile(r'₹\s*([\d,]+\.\d{2})')
+_QTY = re.compile(r'(\d+)\s*(?:PCS|QTY|NOS|UNIT|PCS\.|QTY\.|NOS\.|UNIT\.)?')
+
 def extract_simple_table_data(text: str) -> dict:
     """Simple table data extraction"""
     
@@ -128,20 +400,20 @@ def extract_simple_table_data(text: str) -> dict:
     }
     
     # Find the product section - look for a line starting with a number and containing price information
-    product_section = re.search(r'\d+\s+(.*?)(?=\s*TOTAL:|$)', text, re.DOTALL)
+    product_start = _TABLE_START.search(text)
     
-    if product_section:
-        product_line = product_section.group(1)
+    if product_start:
+        # The section runs until "TOTAL:" (or the end of the text)
+        section_end = text.find('TOTAL:', product_start.end())
+        product_line = text[product_start.end():section_end if section_end != -1 else len(text)].rstrip()
         
         # Extract description (everything before first ₹)
-        desc_match = re.search(r'(.*?)(?=₹)', product_line, re.DOTALL)
-        if desc_match:
-            description = desc_match.group(1).strip()
-            description = re.sub(r'\s+', ' ', description)
-            result["descriptions"] = [description]
+        rupee = product_line.find('₹')
+        if rupee != -1:
+            result["descriptions"] = [' '.join(product_line[:rupee].split())]
         
         # Find all ₹ amounts in the product line
-        amounts = re.findall(r'₹\s*([\d,]+\.\d{2})', product_line)
+        amounts = _AMOUNT.findall(product_line)
         
         if len(amounts) >= 2:
             result["unit_prices"] = [f"₹{amounts[0]}"]  # First amount is unit price
@@ -151,7 +423,7 @@ def extract_simple_table_data(text: str) -> dict:
             result["net_amounts"] = [f"₹{amounts[0]}"]
         
         # Extract quantity (look for a number between the amounts)
-        qty_match = re.search(r'(\d+)\s*(?:PCS|QTY|NOS|UNIT|PCS\.|QTY\.|NOS\.|UNIT\.)?', product_line)
+        qty_match = _QTY.search(product_line)
         if qty_match:
             result["qtys"] = [qty_match.group(1)]
         else:
@@ -159,7 +431,10 @@ def extract_simple_table_data(text: str) -> dict:
     
     return result
 
-# Test locally
+# Test locally: python extracter_logic.py Data/invoice_1.pdf
+# (use bulk_extract.py for whole directories)
 if __name__ == "__main__":
-    result = extract_invoice_data("C:\\Users\\karng\\Desktop\\Amazon_Invoice_Extractor\\Data\\invoice_1.pdf")
-    print(json.dumps(result, indent=2, ensure_ascii=False))
\ No newline at end of file
+    import sys
+    for pdf_path in sys.argv[1:] or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data", "invoice_1.pdf")]:
+        result = extract_invoice_data(pdf_path)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
\ No newline at end of file
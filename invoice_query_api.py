@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from export_formats import EXPORT_MEDIA_TYPES, csv_lines, ndjson_lines
+from typing import Optional
+
+# Create a router instance
+router = APIRouter()
+
+def get_store(request: Request):
+    store = getattr(request.app.state, "invoice_store", None)
+    if store is None:
+        raise HTTPException(status_code=503, detail="Invoice store is disabled (set INVOICE_DB_PATH)")
+    return store
+
+def store_filters(order_number, invoice_number, gst_registration_no, invoice_date, seller_name) -> dict:
+    return {
+        "order_number": order_number,
+        "invoice_number": invoice_number,
+        "gst_registration_no": gst_registration_no,
+        "invoice_date": invoice_date,
+        "seller_name": seller_name,
+    }
+
+@router.get("/invoices")
+def query_invoices(
+    request: Request,
+    order_number: Optional[str] = None,
+    invoice_number: Optional[str] = None,
+    gst_registration_no: Optional[str] = None,
+    invoice_date: Optional[str] = None,
+    seller_name: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0
+):
+    """Look up stored invoices by any of the indexed fields (exact match) and an invoice date range"""
+    store = get_store(request)
+    filters = store_filters(order_number, invoice_number, gst_registration_no, invoice_date, seller_name)
+    limit = max(1, min(limit, 1000))
+
+    return {
+        "count": store.count(filters, date_from, date_to),
+        "limit": limit,
+        "offset": offset,
+        "results": store.query(filters, date_from, date_to, limit=limit, offset=max(offset, 0))
+    }
+
+@router.get("/invoices/export")
+def export_invoices(
+    request: Request,
+    format: str = "csv",
+    order_number: Optional[str] = None,
+    invoice_number: Optional[str] = None,
+    gst_registration_no: Optional[str] = None,
+    invoice_date: Optional[str] = None,
+    seller_name: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+):
+    """Stream all stored invoices matching the filters as CSV or NDJSON"""
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Store exports support csv and ndjson")
+
+    store = get_store(request)
+    filters = store_filters(order_number, invoice_number, gst_registration_no, invoice_date, seller_name)
+    results = store.iter_results(filters, date_from, date_to)
+    lines = csv_lines(results) if format == "csv" else ndjson_lines(results)
+
+    return StreamingResponse(lines, media_type=EXPORT_MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="invoices.{format}"'})
@@ -0,0 +1,210 @@
+"""
+Persistent SQLite store of extracted invoices with indexed lookups
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Columns that can be filtered on, all of them indexed
+INDEXED_COLUMNS = ('order_number', 'invoice_number', 'gst_registration_no', 'invoice_date', 'seller_name')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY,
+    content_digest TEXT UNIQUE,  -- sha256 of the PDF, one row per document
+    filename TEXT,
+    order_number TEXT,
+    invoice_number TEXT,
+    gst_registration_no TEXT,
+    invoice_date TEXT,          -- ISO date (YYYY-MM-DD) so ranges sort correctly
+    seller_name TEXT,
+    status TEXT,
+    extracted_at REAL,
+    data TEXT NOT NULL          -- the full extraction result as JSON
+);
+CREATE INDEX IF NOT EXISTS idx_invoices_order_number ON invoices (order_number);
+CREATE INDEX IF NOT EXISTS idx_invoices_invoice_number ON invoices (invoice_number);
+CREATE INDEX IF NOT EXISTS idx_invoices_gst_registration_no ON invoices (gst_registration_no);
+CREATE INDEX IF NOT EXISTS idx_invoices_invoice_date ON invoices (invoice_date);
+CREATE INDEX IF NOT EXISTS idx_invoices_seller_name ON invoices (seller_name);
+"""
+
+INSERT = """
+INSERT OR REPLACE INTO invoices (content_digest, filename, order_number, invoice_number,
+    gst_registration_no, invoice_date, seller_name, status, extracted_at, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+
+
+def iso_date(value: Optional[str]) -> Optional[str]:
+    """'10.06.2025' -> '2025-06-10', values already in ISO form are kept"""
+    if not value:
+        return None
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+class InvoiceStore:
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        """
+        Results passed to add() are queued and written by a background thread,
+        batch_size rows per transaction or at least every flush_interval seconds.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        # The writer thread starts with the first add(), so a store created at
+        # import time survives a preloading server forking its workers
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        # One read connection per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # Writes
+
+    def add(self, result: dict, content_digest: str = None):
+        """
+        Queue one extraction result for writing, replacing an earlier result for the
+        same PDF. Without a content_digest the row cannot be matched and is always added.
+        """
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="invoice-store-writer",
+                                                    daemon=True)
+                    self._writer.start()
+        self._queue.put((content_digest, result, time.time()))
+
+    def add_many(self, results: Iterable[Tuple[dict, str]]):
+        """add() for every (result, content_digest) pair"""
+        for result, content_digest in results:
+            self.add(result, content_digest)
+
+    def flush(self):
+        """Block until every queued result has been written"""
+        self._queue.join()
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                item = self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        self._queue.task_done()
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                pass
+
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(INSERT, [self._row(*item) for item in batch])
+                except sqlite3.Error as e:
+                    print(f"❌ Invoice store write failed: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        conn.close()
+
+    @staticmethod
+    def _row(content_digest: Optional[str], result: dict, extracted_at: float) -> tuple:
+        return (
+            content_digest,
+            result.get("filename"),
+            result.get("order_number"),
+            result.get("invoice_number"),
+            result.get("gst_registration_no"),
+            iso_date(result.get("invoice_date")),
+            result.get("seller_name"),
+            result.get("status"),
+            extracted_at,
+            json.dumps(result, ensure_ascii=False),
+        )
+
+    # Reads
+
+    @staticmethod
+    def _where(filters: Dict[str, str], date_from: str = None, date_to: str = None):
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in INDEXED_COLUMNS:
+                raise ValueError(f"Cannot filter on '{column}'")
+            if value is None:
+                continue
+            clauses.append(f"{column} = ?")
+            params.append(iso_date(value) if column == "invoice_date" else value)
+        if date_from:
+            clauses.append("invoice_date >= ?")
+            params.append(iso_date(date_from))
+        if date_to:
+            clauses.append("invoice_date <= ?")
+            params.append(iso_date(date_to))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, filters: Dict[str, str] = None, date_from: str = None, date_to: str = None,
+              limit: int = 100, offset: int = 0) -> List[dict]:
+        """Stored results matching all filters, newest invoice date first"""
+        where, params = self._where(filters or {}, date_from, date_to)
+        rows = self._reader().execute(
+            f"SELECT data FROM invoices{where} ORDER BY invoice_date DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self, filters: Dict[str, str] = None, date_from: str = None, date_to: str = None) -> int:
+        where, params = self._where(filters or {}, date_from, date_to)
+        return self._reader().execute(f"SELECT COUNT(*) FROM invoices{where}", params).fetchone()[0]
+
+    def iter_results(self, filters: Dict[str, str] = None, date_from: str = None,
+                     date_to: str = None) -> Iterator[dict]:
+        """Stream matching results from a cursor, for exports of any size"""
+        where, params = self._where(filters or {}, date_from, date_to)
+        conn = self._connect()
+        try:
+            for row in conn.execute(f"SELECT data FROM invoices{where} ORDER BY invoice_date, id", params):
+                yield json.loads(row[0])
+        finally:
+            conn.close()
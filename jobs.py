@@ -0,0 +1,268 @@
+"""
+Background extraction jobs with per-file status tracking. With a directory the
+job state is also written there, so every server process can answer for jobs
+another process is running.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+# Seconds between reloads of a job run by another process, while waiting for changes
+SHARED_POLL_INTERVAL = 0.5
+
+# Seconds between saves of a running job; changes in between are saved together
+JOB_SAVE_INTERVAL = float(os.getenv("JOB_SAVE_INTERVAL", "0.25"))
+
+
+class Job:
+    def __init__(self, filenames: List[str], on_change: Callable[["Job"], None] = None):
+        """on_change - called after every status change, e.g. to save the job"""
+        self.id = str(uuid.uuid4())
+        self.created_at = time.time()
+        self.finished_at = None
+        self.files = [{"filename": name, "status": "queued"} for name in filenames]
+        self.results = [None] * len(filenames)
+        self.successful = 0
+        self.failed = 0
+        self.running = 0
+        self.task = None  # asyncio.Task processing the job
+
+        # File indices in the order their status changed, replayed by event streams
+        self.log = []
+        self._changed = asyncio.Event()
+        self._on_change = on_change
+
+    @property
+    def total(self) -> int:
+        return len(self.files)
+
+    @property
+    def done(self) -> int:
+        return self.successful + self.failed
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "completed"
+        return "running" if self.log else "queued"
+
+    @property
+    def version(self) -> int:
+        return len(self.log)
+
+    def _notify(self, index: int):
+        self.log.append(index)
+        self._changed.set()
+        self._changed = asyncio.Event()
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def start_file(self, index: int):
+        self.files[index]["status"] = "processing"
+        self.running += 1
+        self._notify(index)
+
+    def finish_file(self, index: int, result: dict):
+        entry = self.files[index]
+        entry["status"] = "success" if result.get("status") == "success" else "failed"
+        if "error" in result:
+            entry["error"] = result["error"]
+        self.results[index] = result
+
+        if entry["status"] == "success":
+            self.successful += 1
+        else:
+            self.failed += 1
+        self.running -= 1
+        self._notify(index)
+
+    def finish(self):
+        self.finished_at = time.time()
+        self._notify(-1)
+
+    async def wait_for_change(self, version: int, timeout: float = None) -> bool:
+        """Wait until the job moves past version, returns False on timeout"""
+        if self.version > version:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def progress(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "running": self.running,
+            "successful": self.successful,
+            "failed": self.failed,
+        }
+
+    def file_event(self, index: int) -> dict:
+        return {"index": index, **self.files[index], "progress": self.progress()}
+
+    def summary(self) -> dict:
+        return {**self.progress(), "created_at": self.created_at,
+                "finished_at": self.finished_at, "files": self.files}
+
+    def snapshot(self) -> dict:
+        """State written for other processes; results only once the job is done"""
+        return {
+            "id": self.id,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "files": self.files,
+            "results": self.results if self.finished_at is not None else None,
+            "successful": self.successful,
+            "failed": self.failed,
+            "running": self.running,
+            "log": self.log,
+        }
+
+
+class SharedJob(Job):
+    """Read-only view of a job run by another process, reloaded from its saved state"""
+    def __init__(self, path: str, state: dict):
+        self.path = path
+        self._load(state)
+
+    def _load(self, state: dict):
+        self.id = state["id"]
+        self.created_at = state["created_at"]
+        self.finished_at = state["finished_at"]
+        self.files = state["files"]
+        self.results = state["results"] or [None] * len(self.files)
+        self.successful = state["successful"]
+        self.failed = state["failed"]
+        self.running = state["running"]
+        self.log = state["log"]
+
+    def refresh(self):
+        state = _read_state(self.path)
+        if state is not None:
+            self._load(state)
+
+    async def wait_for_change(self, version: int, timeout: float = None) -> bool:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.version <= version:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+            self.refresh()
+        return True
+
+
+def _read_state(path: str) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class JobStore:
+    def __init__(self, max_jobs: int = 1000, directory: str = None):
+        """
+        Keeps at most max_jobs jobs, the oldest completed ones are dropped first.
+        directory - optional directory shared by the server processes; jobs are
+        saved there at most every JOB_SAVE_INTERVAL seconds while running, and
+        once more when finished, and looked up there when not local
+        """
+        self.max_jobs = max_jobs
+        self.directory = directory
+        self._jobs = OrderedDict()
+        self._saving = {}  # job id -> task saving that job
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def create(self, filenames: List[str]) -> Job:
+        job = Job(filenames, on_change=self._schedule_save if self.directory else None)
+        self._jobs[job.id] = job
+        self._evict()
+        if self.directory:
+            # Saved right away, so other processes can answer as soon as the id is returned
+            self._write(job.id, json.dumps(job.snapshot(), ensure_ascii=False))
+            asyncio.get_running_loop().run_in_executor(None, self._prune)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None or not self.directory:
+            return job
+        # Job ids are uuids, anything else never names a file
+        try:
+            uuid.UUID(job_id)
+        except ValueError:
+            return None
+        path = self._path(job_id)
+        state = _read_state(path)
+        return SharedJob(path, state) if state is not None else None
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _schedule_save(self, job: Job):
+        if job.id not in self._saving:
+            self._saving[job.id] = asyncio.get_running_loop().create_task(self._save(job))
+
+    async def _save(self, job: Job):
+        """Save the job until the file is up to date, one write at a time so none overtakes another"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if job.finished_at is None:
+                    await asyncio.sleep(JOB_SAVE_INTERVAL)
+                version = job.version
+                try:
+                    # Serialized here, the job keeps changing while the file is written
+                    state = json.dumps(job.snapshot(), ensure_ascii=False)
+                except (TypeError, ValueError) as e:
+                    print(f"❌ Saving job {job.id} failed: {e}")
+                    return
+                await loop.run_in_executor(None, self._write, job.id, state)
+                if job.version == version:
+                    return
+        finally:
+            del self._saving[job.id]
+
+    def _write(self, job_id: str, state: str):
+        path = self._path(job_id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(state)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"❌ Saving job {job_id} failed: {e}")
+
+    def _prune(self):
+        """Keep the max_jobs most recently changed job files; running jobs change all the time"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+            entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        except OSError:
+            return
+        for entry in entries[self.max_jobs:]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                break
+
+    def __len__(self) -> int:
+        return len(self._jobs)
@@ -0,0 +1,179 @@
+"""
+Line-item table extraction from pdfminer's positioned characters.
+
+Each page is reduced to its visual lines, [y0, y1, [[x0, text], ...]] from top
+to bottom, where the cells are runs of characters without a wide gap. Column
+positions come from the table header ("Sl. No", "Description", "Unit Price",
+...), and every row that starts with a serial number opens a line item, so
+multi-line descriptions, multi-item orders and tables continued on later pages
+are rebuilt in one pass over each page.
+"""
+import re
+import bisect
+from typing import Iterable, Iterator, Optional
+from pdfminer.layout import LTChar, LTContainer, LTPage
+
+# Header columns that fill result fields; other columns are located but ignored
+FIELD_COLUMNS = {
+    "slno": "serial",
+    "description": "description",
+    "unitprice": "unit_price",
+    "qty": "qty",
+    "netamount": "net_amount",
+}
+
+_AMOUNT = re.compile(r'₹\s*([\d,]+\.\d{2})')
+_INTEGER = re.compile(r'\d+')
+_NON_WORD = re.compile(r'[^a-z]')
+
+def _chars(item) -> Iterator[LTChar]:
+    if isinstance(item, LTChar):
+        yield item
+    elif isinstance(item, LTContainer):
+        for child in item:
+            yield from _chars(child)
+
+def page_lines(ltpage: LTPage) -> list:
+    """Visual lines of a page, top to bottom, split into cells at gaps wider than 0.15 em"""
+    rows = {}
+    for char in _chars(ltpage):
+        rows.setdefault(round(char.y0, 1), []).append(char)
+
+    lines = []
+    for y0 in sorted(rows, reverse=True):
+        chars = sorted(rows[y0], key=lambda char: char.x0)
+        height = max(char.height for char in chars)
+        cells = []
+        start, parts, last_x1 = chars[0].x0, [], None
+        for char in chars:
+            if last_x1 is not None and char.x0 - last_x1 > 0.15 * height:
+                cells.append([round(start, 1), "".join(parts)])
+                start, parts = char.x0, []
+            parts.append(char.get_text())
+            last_x1 = char.x1
+        cells.append([round(start, 1), "".join(parts)])
+        cells = [cell for cell in cells if cell[1].strip()]
+        if cells:
+            lines.append([y0, round(y0 + height, 1), cells])
+    return lines
+
+def _is_total(line: list) -> bool:
+    return any(text.lstrip().startswith("TOTAL:") for _, text in line[2])
+
+def _find_header(lines: list) -> Optional[tuple]:
+    """(column starts, column names, index of the last header line, header line height)"""
+    for index, (y0, y1, cells) in enumerate(lines):
+        if not any(text.strip() == "Description" for _, text in cells):
+            continue
+
+        # Header labels wrap over a few lines around "Description"
+        height = y1 - y0
+        header = [i for i, line in enumerate(lines) if abs(line[0] - y0) <= 0.8 * height]
+        columns = []  # [x0, name], merged by left edge
+        for x0, text in sorted((cell for i in header for cell in lines[i][2]), key=lambda cell: cell[0]):
+            if columns and x0 - columns[-1][0] <= 3:
+                columns[-1][1] += text
+            else:
+                columns.append([x0, text])
+
+        names = [_NON_WORD.sub('', text.lower()) for _, text in columns]
+        if "unitprice" in names or "netamount" in names:
+            return [x0 for x0, _ in columns], names, max(header), height
+    return None
+
+def table_continues(lines: list, open_table: bool) -> bool:
+    """
+    Whether the table goes on after this page: a header was seen (here or on an
+    earlier page) and no TOTAL row yet. Used to stop reading pages early.
+    """
+    if not open_table and _find_header(lines) is None:
+        return False
+    return not any(_is_total(line) for line in lines)
+
+def extract_layout_table(pages: Iterable[list]) -> Optional[dict]:
+    """
+    Line items from the page_lines() of every page, in the shape of
+    extract_simple_table_data. None when no table header is found.
+    """
+    starts = names = None
+    min_height = tolerance = 0
+    items = []
+
+    for lines in pages:
+        header = _find_header(lines)
+        if header is not None:
+            starts, names, last_header, height = header
+            min_height, tolerance = 0.75 * height, 0.5 * height
+            body = lines[last_header + 1:]
+        elif starts is not None:
+            # Continuation page without a repeated header
+            body = lines
+        else:
+            continue
+
+        rows = []
+        finished = False
+        for y0, y1, cells in body:
+            if _is_total([y0, y1, cells]):
+                finished = True
+                break
+            # Page footers are set in a much smaller font than the table
+            if y1 - y0 < min_height:
+                continue
+            row = {}
+            for x0, text in cells:
+                column = bisect.bisect_right(starts, x0 + 2) - 1
+                if column >= 0 and names[column] in FIELD_COLUMNS:
+                    row.setdefault(FIELD_COLUMNS[names[column]], []).append(text.strip())
+            rows.append((y1, row))
+
+        # Serial numbers sit a little below the top of their row, so an item owns
+        # every line from just above its serial down to just above the next one
+        serial_tops = [-y1 for y1, row in rows
+                       if any(_INTEGER.fullmatch(text) for text in row.get("serial", ()))]
+        page_items = [_new_item() for _ in serial_tops]
+        for y1, row in rows:
+            index = bisect.bisect_right(serial_tops, tolerance - y1) - 1
+            if index >= 0:
+                _add_row(page_items[index], row)
+            elif items:
+                # Above the first serial of a page: the previous page's last item continues
+                _add_row(items[-1], row)
+            elif page_items:
+                _add_row(page_items[0], row)
+        items.extend(page_items)
+
+        if finished:
+            break
+
+    if starts is None:
+        return None
+    return {
+        "descriptions": [' '.join(' '.join(item["description"]).split()) or None for item in items],
+        "unit_prices": [item["unit_price"] for item in items],
+        "qtys": [item["qty"] for item in items],
+        "net_amounts": [item["net_amount"] for item in items],
+    }
+
+def _new_item() -> dict:
+    return {"description": [], "described": False, "unit_price": None, "qty": None, "net_amount": None}
+
+def _add_row(item: dict, row: dict):
+    if not item["described"]:
+        for text in row.get("description", ()):
+            item["description"].append(text)
+            # The description cell ends with the HSN code
+            if text.startswith("HSN:"):
+                item["described"] = True
+    for field in ("unit_price", "net_amount"):
+        if item[field] is None:
+            for text in row.get(field, ()):
+                match = _AMOUNT.search(text)
+                if match:
+                    item[field] = f"₹{match.group(1)}"
+                    break
+    if item["qty"] is None:
+        for text in row.get("qty", ()):
+            if _INTEGER.fullmatch(text):
+                item["qty"] = text
+                break
@@ -0,0 +1,237 @@
+"""
+Counters, gauges and histograms rendered in the Prometheus text format, without
+a client library. Pipeline stages that run in worker processes are timed with
+stage() and handed back to the API process by timed_call().
+"""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Upper bounds in seconds, from a cached lookup to a PDF near the worker timeout
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = None) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 function: Callable[[], Dict[tuple, float]] = None):
+        """
+        labelnames - label names, values are passed as keyword arguments
+        function   - optional callable returning {label values: value}, read at scrape time
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """(suffix, formatted labels, value) for every series"""
+        if self.function is not None:
+            values = self.function()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield "", _format_labels(self.labelnames, key), value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (made cumulative when rendered), sum, count
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), total
+            yield "_count", _format_labels(self.labelnames, key), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = (), function: Callable = None) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames, function))
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = (), function: Callable = None) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, function))
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (),
+              buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Pipeline metrics shared by the API modules
+STAGE_SECONDS = histogram(
+    "invoice_stage_duration_seconds",
+    "Time spent in each stage of the extraction pipeline",
+    ["stage"],
+)
+QUEUE_WAIT_SECONDS = histogram(
+    "invoice_executor_queue_wait_seconds",
+    "Time a task waited for a free extraction worker",
+)
+EXTRACTIONS = counter(
+    "invoice_extractions_total",
+    "PDF extractions by outcome (cache hits not included)",
+    ["status", "reason"],
+)
+FIELD_RESULTS = counter(
+    "invoice_fields_total",
+    "Header fields found or missing per extracted invoice",
+    ["layout", "field", "outcome"],
+)
+
+
+# Stage timings collected in the worker that runs a timed_call
+_collector = threading.local()
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a block as one pipeline stage. Only recorded inside timed_call, so the
+    extraction functions cost nothing extra when called directly.
+    """
+    timings = getattr(_collector, "timings", None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+def field_timings() -> Optional[dict]:
+    """Dict collecting seconds per field pattern while a profiled call runs, else None"""
+    return getattr(_collector, "fields", None)
+
+@contextmanager
+def collect_timings(fields: bool = False):
+    """Collect stage() timings (and field timings) of the block: yields (stages, fields)"""
+    previous = getattr(_collector, "timings", None), getattr(_collector, "fields", None)
+    _collector.timings, _collector.fields = {}, ({} if fields else None)
+    try:
+        yield _collector.timings, _collector.fields
+    finally:
+        _collector.timings, _collector.fields = previous
+
+def timed_call(fn, *args, **kwargs) -> tuple:
+    """
+    Worker entry point wrapper: (result, {stage: seconds}, wall-clock start time).
+    The start time lets the caller work out how long the task was queued.
+    """
+    started = time.time()
+    with collect_timings() as (timings, _):
+        result = fn(*args, **kwargs)
+    return result, timings, started
+
+def record_timings(timings: Dict[str, float]):
+    for name, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage=name)
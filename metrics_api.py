@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from metrics import REGISTRY
+
+# Create a router instance
+router = APIRouter()
+
+# Content type of the Prometheus text exposition format
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Stage latency histograms, executor load, cache and per-field counters for Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_MEDIA_TYPE)
@@ -0,0 +1,51 @@
+"""
+Opt-in profiling of a single extraction: stage and per-field timings, and
+optionally a cProfile of the whole call. Runs in the worker like timed_call.
+"""
+import time
+import marshal
+import pstats
+import cProfile
+from metrics import collect_timings
+
+# Functions listed in the response, by cumulative time
+HOT_SPOTS = 20
+
+def hot_spots(profile: cProfile.Profile, limit: int = HOT_SPOTS) -> list:
+    """The limit functions with the most cumulative time"""
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({function})",
+            "calls": ncalls,
+            "total_seconds": round(tottime, 6),
+            "cumulative_seconds": round(cumtime, 6),
+        })
+    rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+    return rows[:limit]
+
+def profiled_call(with_cprofile: bool, fn, *args, **kwargs) -> tuple:
+    """
+    Worker entry point wrapper: (result, report, profile data). The report holds
+    the wall-clock start time, {stage: seconds} and {field: seconds}; profile data
+    is the cProfile dump in the .prof format pstats reads, or None.
+    """
+    started = time.time()
+    profile = cProfile.Profile() if with_cprofile else None
+    with collect_timings(fields=True) as (stages, fields):
+        if profile is not None:
+            profile.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.disable()
+
+    report = {"started": started, "stages": stages, "fields": fields}
+    data = None
+    if profile is not None:
+        report["hot_spots"] = hot_spots(profile)
+        profile.create_stats()
+        data = marshal.dumps(profile.stats)
+    return result, report, data
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+import tempfile
+import secrets
+import time
+import uuid
+import os
+
+# Create a router instance
+router = APIRouter()
+
+# Admins profile a request or start a re-extraction by sending this token in the
+# X-Admin-Token header (both are disabled while PROFILING_TOKEN is empty)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+
+# cProfile dumps are kept here for download until they expire
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "invoice_profiles")
+PROFILE_TTL = float(os.getenv("PROFILE_TTL", "3600"))
+
+def require_admin(token: Optional[str]):
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (set PROFILING_TOKEN)")
+    if not token or not secrets.compare_digest(token, PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="A valid X-Admin-Token header is required")
+
+def prune_profiles():
+    """Remove profile dumps older than PROFILE_TTL"""
+    cutoff = time.time() - PROFILE_TTL
+    try:
+        entries = list(os.scandir(PROFILE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+def save_profile(data: bytes) -> str:
+    """Store a cProfile dump, returns its profile_id"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    prune_profiles()
+    profile_id = str(uuid.uuid4())
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.prof"), "wb") as f:
+        f.write(data)
+    return profile_id
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """
+    Download the cProfile dump of a profiled extraction (admins only).
+    Open it with python -m pstats or a viewer such as snakeviz.
+    """
+    require_admin(x_admin_token)
+    try:
+        profile_id = str(uuid.UUID(profile_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    filepath = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    if not os.path.exists(filepath):
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    
+    return FileResponse(path=filepath, filename=f"extraction_{profile_id}.prof",
+                        media_type="application/octet-stream")
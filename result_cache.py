@@ -0,0 +1,222 @@
+"""
+Bounded result cache with LRU and TTL eviction and an optional on-disk tier
+"""
+import os
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+# Seconds between full rescans of the on-disk tier, which pick up files written by
+# other processes; in between the tier is tracked from this process's own writes
+DISK_RESCAN_INTERVAL = 3600
+
+
+def content_digest(content: bytes) -> str:
+    """sha256 of the PDF bytes; use hashlib.sha256() directly when reading in chunks"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def content_key(digest: str, version: str) -> str:
+    """Cache key for a PDF: its content digest combined with the extractor version"""
+    return hashlib.sha256(f"{version}\0{digest}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, disk_dir: str = None,
+                 disk_max_bytes: int = 1024 * 1024 * 1024):
+        """
+        max_entries    - entries kept in memory, least recently used are evicted first
+        ttl_seconds    - entries older than this are treated as missing (0 disables)
+        disk_dir       - optional directory for a persistent JSON tier behind the memory tier
+        disk_max_bytes - size limit of disk_dir, the oldest files are removed first (0 disables)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+        # Files of the disk tier, oldest first, with their total size
+        self._disk_files = OrderedDict()  # path -> (mtime, size)
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self._last_scan = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _expired(self, stored_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - stored_at > self.ttl_seconds
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self.evictions += 1
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store(key, value)
+        self._write_disk(key, value)
+
+    async def set_async(self, key: str, value: Any):
+        """set() for the event loop: the disk tier is written in the default executor"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store(key, value)
+        if self.disk_dir:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_disk, key, value)
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.unlink(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            stat = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            # The disk tier is best effort, the memory tier still holds the value
+            return
+
+        with self._disk_lock:
+            if self._last_scan is None or time.monotonic() - self._last_scan >= DISK_RESCAN_INTERVAL:
+                self._scan_disk()
+            else:
+                self._forget_file(path)
+                self._disk_files[path] = (stat.st_mtime, stat.st_size)
+                self._disk_bytes += stat.st_size
+            self._evict_disk()
+
+    def sweep_disk(self):
+        """
+        Rescan the disk tier, then remove expired files and the oldest ones while it
+        is larger than disk_max_bytes. Writes do the same from the tracked files.
+        """
+        if not self.disk_dir:
+            return
+        with self._disk_lock:
+            self._scan_disk()
+            self._evict_disk()
+
+    def _scan_disk(self):
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        self._disk_files = OrderedDict((path, (mtime, size)) for mtime, size, path in files)
+        self._disk_bytes = sum(size for _, size, _ in files)
+        self._last_scan = time.monotonic()
+
+    def _forget_file(self, path: str):
+        entry = self._disk_files.pop(path, None)
+        if entry is not None:
+            self._disk_bytes -= entry[1]
+
+    def _evict_disk(self):
+        """Remove files from the oldest while they are expired or the tier is too large"""
+        while self._disk_files:
+            path, (mtime, size) = next(iter(self._disk_files.items()))
+            if not self._expired(mtime) and (not self.disk_max_bytes or self._disk_bytes <= self.disk_max_bytes):
+                break
+            self._forget_file(path)
+            try:
+                os.unlink(path)
+                self.disk_evictions += 1
+            except OSError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                return True
+        # Entries written by another process only exist on disk
+        if not self.disk_dir:
+            return False
+        try:
+            return not self._expired(os.path.getmtime(self._disk_path(key)))
+        except OSError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": bool(self.disk_dir),
+            "disk_files": len(self._disk_files),
+            "disk_bytes": self._disk_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -1,27 +1,125 @@
 #!/usr/bin/env python3
 """
 Script to run the FastAPI server
+
+    python run_api.py                            # development, single process with auto-reload
+    python run_api.py --production --workers 4   # production, N worker processes on one port
+
+Production mode runs gunicorn with uvicorn workers. The API module is imported
+once in the master (preload), so the forked server workers start without
+re-importing it. Extraction itself runs in each server worker's own spawned
+extraction processes (with the isolated or process backends), which
+import only the extraction code and are warmed up on a sample invoice before
+the server worker accepts traffic.
+Send SIGHUP to the master for a graceful restart of all workers. Without
+gunicorn (e.g. on Windows), uvicorn's own process manager is used instead.
+
+Jobs and cached responses are kept in directories shared by the server workers
+(JOB_DIR and RESULT_CACHE_DIR, defaulting to per-port directories under the temp
+directory), so /jobs and /export work whichever worker a request lands on.
+Admission limits are enforced by each server worker on its own.
 """
-import uvicorn
+import argparse
+import importlib.util
 import sys
 import os
+import tempfile
 
-def main():
-    """Run the FastAPI server"""
-    print("🚀 Starting Amazon Invoice Extractor API...")
-    print("📡 Server will be available at: http://localhost:8000")
-    print("📋 API Documentation: http://localhost:8000/docs")
-    print("🔄 Health Check: http://localhost:8000/health")
-    print("\n" + "="*50)
-    
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Production settings (override through environment variables)
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))  # 0 = one per CPU core
+API_MAX_REQUESTS = int(os.getenv("API_MAX_REQUESTS", "10000"))  # recycle a worker after this many requests, 0 disables
+API_GRACEFUL_TIMEOUT = int(os.getenv("API_GRACEFUL_TIMEOUT", "90"))  # seconds in-flight requests get on restart
+
+def worker_class() -> str:
+    if importlib.util.find_spec("uvicorn_worker") is not None:
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+def preload():
+    """Import the API in the master and run one extraction, so workers inherit a warm process"""
+    import extract_invoice_api
+    from extracter_logic import extract_invoice_data
+    sample = extract_invoice_api.WARMUP_SAMPLE
+    if sample and os.path.exists(sample):
+        extract_invoice_data(sample)
+    return extract_invoice_api.app
+
+def run_production(host: str, port: int, workers: int):
+    # Every server worker runs its own extraction workers, so the cores are split between them
+    os.environ.setdefault("EXTRACTION_WORKERS", str(max((os.cpu_count() or 1) // workers, 1)))
+    # State the workers must share, set before the API module is imported
+    os.environ.setdefault("JOB_DIR", os.path.join(tempfile.gettempdir(), f"invoice_jobs_{port}"))
+    os.environ.setdefault("RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), f"invoice_results_{port}"))
+
+    import uvicorn
     try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("⚠️ gunicorn is not installed, using uvicorn workers (no preloading)")
         uvicorn.run(
             "extract_invoice_api:app",
-            host="0.0.0.0",
-            port=8000,
-            reload=True,
+            app_dir=APP_DIR,
+            host=host,
+            port=port,
+            workers=workers,
+            limit_max_requests=API_MAX_REQUESTS or None,
+            timeout_graceful_shutdown=API_GRACEFUL_TIMEOUT,
             log_level="info"
         )
+        return
+
+    class ProductionApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", worker_class())
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", API_GRACEFUL_TIMEOUT)
+            self.cfg.set("max_requests", API_MAX_REQUESTS)
+            self.cfg.set("max_requests_jitter", API_MAX_REQUESTS // 10)
+            self.cfg.set("loglevel", "info")
+
+        def load(self):
+            return preload()
+
+    ProductionApplication().run()
+
+def main():
+    """Run the FastAPI server"""
+    parser = argparse.ArgumentParser(description="Run the Amazon Invoice Extractor API")
+    parser.add_argument("--production", action="store_true", help="Run several worker processes without auto-reload")
+    parser.add_argument("-w", "--workers", type=int, default=API_WORKERS,
+                        help="Worker processes in production mode (default: one per core)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    print("🚀 Starting Amazon Invoice Extractor API...")
+    print(f"📡 Server will be available at: http://localhost:{args.port}")
+    print(f"📋 API Documentation: http://localhost:{args.port}/docs")
+    print(f"🔄 Health Check: http://localhost:{args.port}/health")
+    print("\n" + "="*50)
+
+    # Imported here rather than at the top: spawned extraction workers re-import
+    # this script as their main module and have no use for the server
+    import uvicorn
+
+    try:
+        if args.production:
+            workers = args.workers or os.cpu_count() or 1
+            print(f"🏭 Production mode with {workers} worker(s)")
+            run_production(args.host, args.port, workers)
+        else:
+            uvicorn.run(
+                "extract_invoice_api:app",
+                app_dir=APP_DIR,
+                host=args.host,
+                port=args.port,
+                reload=True,
+                log_level="info"
+            )
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
@@ -29,4 +127,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -24,20 +24,20 @@ def check_api_health():
     except:
         return False
 
-def process_invoices(files):
-    """Process multiple invoice files"""
+def submit_job(files):
+    """Submit invoice files as a background job, returns the job info"""
     files_data = []
     for file in files:
         files_data.append(("files", (file.name, file.getvalue(), "application/pdf")))
     
     try:
         response = requests.post(
-            f"{API_BASE_URL}/extract-multiple-invoices",
+            f"{API_BASE_URL}/jobs",
             files=files_data,
             timeout=120
         )
         
-        if response.status_code == 200:
+        if response.status_code == 202:
             return response.json()
         else:
             st.error(f"API Error: {response.status_code} - {response.text}")
@@ -46,36 +46,49 @@ def process_invoices(files):
         st.error(f"Connection Error: {str(e)}")
         return None
 
-def generate_excel(results):
-    """Generate Excel file from results"""
+def process_invoices(files, on_progress=None):
+    """Process multiple invoice files as a job, reporting per-file progress"""
+    job = submit_job(files)
+    if not job:
+        return None
+    
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/generate-excel",
-            json={"results": results},
-            timeout=30
-        )
+        # Poll the job until every file is done
+        while True:
+            response = requests.get(f"{API_BASE_URL}/jobs/{job['job_id']}", timeout=10)
+            if response.status_code != 200:
+                st.error(f"API Error: {response.status_code} - {response.text}")
+                return None
+            
+            status = response.json()
+            if on_progress:
+                on_progress(status)
+            if status["status"] == "completed":
+                break
+            time.sleep(0.5)
         
+        response = requests.get(f"{API_BASE_URL}/jobs/{job['job_id']}/results", timeout=30)
         if response.status_code == 200:
             return response.json()
         else:
-            st.error(f"Excel Generation Error: {response.status_code} - {response.text}")
+            st.error(f"API Error: {response.status_code} - {response.text}")
             return None
     except requests.exceptions.RequestException as e:
         st.error(f"Connection Error: {str(e)}")
         return None
 
-def download_excel():
-    """Download the generated Excel file"""
+def download_export(cache_id):
+    """Download the Excel export of processed results by their cache_id"""
     try:
-        response = requests.get(f"{API_BASE_URL}/download-excel", timeout=30)
+        response = requests.get(f"{API_BASE_URL}/export/{cache_id}", timeout=60)
         
         if response.status_code == 200:
             return response.content
         elif response.status_code == 404:
-            st.error("No Excel file available. Please process invoices and generate Excel first.")
+            st.error("Results have expired on the server. Please process the invoices again.")
             return None
         else:
-            st.error(f"Download Error: {response.status_code}")
+            st.error(f"Download Error: {response.status_code} - {response.text}")
             return None
     except requests.exceptions.RequestException as e:
         st.error(f"Connection Error: {str(e)}")
@@ -144,11 +157,16 @@ def main():
                 status_text = st.empty()
                 
                 # Process files
-                status_text.text("📤 Uploading files and processing...")
-                progress_bar.progress(25)
+                status_text.text("📤 Uploading files...")
+                
+                def show_progress(status):
+                    progress_bar.progress(status["done"] / max(status["total"], 1))
+                    status_text.text(
+                        f"⚙️ Processed {status['done']} of {status['total']} file(s) "
+                        f"({status['successful']} successful, {status['failed']} failed)"
+                    )
                 
-                result = process_invoices(uploaded_files)
-                progress_bar.progress(75)
+                result = process_invoices(uploaded_files, on_progress=show_progress)
                 
                 if result:
                     status_text.text("✅ Processing completed!")
@@ -156,6 +174,7 @@ def main():
                     
                     # Store results in session state
                     st.session_state.processing_results = result
+                    st.session_state.pop('excel_content', None)
                     
                     # Display results summary
                     st.success(f"🎉 Processing completed!")
@@ -202,35 +221,30 @@ def main():
         if st.button("📊 Generate Excel File", type="secondary"):
             if 'processing_results' in st.session_state:
                 with st.spinner("Generating Excel file..."):
-                    excel_result = generate_excel(st.session_state.processing_results['results'])
+                    cache_id = st.session_state.processing_results['cache_id']
+                    excel_content = download_export(cache_id)
                     
-                    if excel_result:
+                    if excel_content:
                         st.success("✅ Excel file generated successfully!")
-                        st.info(f"📈 {excel_result['records_added']} records added to Excel file")
-                        st.session_state.excel_ready = True
-                        st.session_state.excel_filename = excel_result['filename']
+                        st.info(f"📈 {st.session_state.processing_results['total_processed']} records added to Excel file")
+                        st.session_state.excel_content = excel_content
+                        st.session_state.excel_filename = f"amazon_invoices_{cache_id}.xlsx"
                     else:
                         st.error("❌ Failed to generate Excel file")
             else:
                 st.warning("⚠️ Please process some invoices first!")
         
         # Download Excel button
-        if st.button("⬇️ Download Excel File", type="primary"):
-            with st.spinner("Preparing download..."):
-                excel_content = download_excel()
-                
-                if excel_content:
-                    filename = st.session_state.get('excel_filename', 'amazon_invoices.xlsx')
-                    st.download_button(
-                        label=f"💾 Download {filename}",
-                        data=excel_content,
-                        file_name=filename,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key="download_button"
-                    )
-                    st.success("✅ Excel file ready for download!")
-                else:
-                    st.error("❌ No Excel file available. Please process invoices and generate Excel first.")
+        if 'excel_content' in st.session_state:
+            filename = st.session_state.get('excel_filename', 'amazon_invoices.xlsx')
+            st.download_button(
+                label=f"⬇️ Download {filename}",
+                data=st.session_state.excel_content,
+                file_name=filename,
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                type="primary",
+                key="download_button"
+            )
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,110 @@
+"""
+Compatibility test of the field-spec engine against the Data/ samples. The
+expected dicts are the output of the original regex implementation; keys and
+their order are part of the result and are checked too.
+
+    python -m pytest test_extracter_logic.py
+"""
+import os
+import pytest
+from extracter_logic import LAYOUT_TEMPLATES, extract_fields, extract_page_text, parse_invoice_text
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Data")
+
+# Header fields, as extract_fields returns them
+EXPECTED_FIELDS = {
+    "invoice_1.pdf": {
+        "order_number": "407-2126009-5587507",
+        "order_date": "10.06.2025",
+        "invoice_number": "BOM7-556301O",
+        "invoice_details": "MH-BOM7-1931441115-2526",
+        "invoice_date": "10.06.2025",
+        "gst_registration_no": "27AALCR3173P1ZN",
+        "state_ut_code": "27",
+        "place_of_supply": "MAHARASHTRA",
+        "place_of_delivery": "MAHARASHTRA",
+        "seller_name": "RETAILEZ PRIVATE LIMITED",
+        "seller_address": None,
+        "billing_address": "Karn gupta 604 buniyad building, Yeshodham, goregaon east MUMBAI, MAHARASHTRA, 400063 IN",
+        "shipping_address": "Karn gupta Karn gupta 604 buniyad building, Yeshodham, goregaon east MUMBAI, MAHARASHTRA, 400063 IN",
+        "total_amount": "₹764.00",
+    },
+    "invoice_2.pdf": {
+        "order_number": "407-9096405-7570728",
+        "order_date": "28.05.2025",
+        "invoice_number": "IN-66O",
+        "invoice_details": "RJ-127874073-2526I",
+        "invoice_date": "28.05.2025",
+        "gst_registration_no": "08CPFPB5449Q1ZC",
+        "state_ut_code": "27",
+        "place_of_supply": "MAHARASHTRA",
+        "place_of_delivery": "MAHARASHTRA",
+        "seller_name": "Mannat Boutique & Fashion",
+        "seller_address": None,
+        "billing_address": "Karn gupta 604 buniyad building, Yeshodham, goregaon east MUMBAI, MAHARASHTRA, 400063 IN",
+        "shipping_address": "Karn gupta Karn gupta 604 buniyad building, Yeshodham, goregaon east MUMBAI, MAHARASHTRA, 400063 IN",
+        "total_amount": None,
+    },
+    "invoice_3.pdf": {
+        "order_number": "407-8623089-0137139",
+        "order_date": "11.05.2025",
+        "invoice_number": "SBLY-167144O",
+        "invoice_details": "KA-SBLY-1293787125-2526",
+        "invoice_date": "11.05.2025",
+        "gst_registration_no": "29AAECR0564M2ZY",
+        "state_ut_code": "29",
+        "place_of_supply": "KARNATAKA",
+        "place_of_delivery": "KARNATAKA",
+        "seller_name": "R K World",
+        "seller_address": None,
+        "billing_address": "Karn gupta 5 th floor, Status square, Cleveland road,frazertown BENGALURU, KARNATAKA, 560005 IN",
+        "shipping_address": "Karn gupta Karn gupta 5 th floor, Status square, Cleveland road,frazertown BENGALURU, KARNATAKA, 560005 IN",
+        "total_amount": "₹189.00",
+    },
+}
+
+# Line items found in the first-page text alone (no layout), as extract_simple_table_data returns them
+EXPECTED_TEXT_TABLES = {
+    "invoice_1.pdf": {
+        "descriptions": ["of 1For RETAILEZ PRIVATE LIMITED:Authorized SignatoryOrder Number:407-2126009-5587507Invoice Number :BOM7-556301Order Date:10.06.2025Invoice Details :MH-BOM7-1931441115-2526Invoice Date :10.06.2025Sl.NoDescriptionUnitPriceQtyNetAmountTaxRateTaxTypeTaxAmountTotalAmount1Nivia Carbonite 7.0 Football Stud for Men, TPU Sole with SyntheticLeather Upper, Die Cut Lightweight Insole, Ideal for Soft and HardGrassy Ground Surfaces- UK08(Mid Blue) | B0DPMXBMZK (B0DPMXBMZK ) HSN:64041190"],
+        "unit_prices": ["₹682.14"],
+        "qtys": ["1"],
+        "net_amounts": ["₹682.14"],
+    },
+    "invoice_2.pdf": {
+        "descriptions": ["of 1For Mannat Boutique & Fashion:Authorized SignatoryOrder Number:407-9096405-7570728Invoice Number :IN-66Order Date:28.05.2025Invoice Details :RJ-127874073-2526Invoice Date :28.05.2025Sl.NoDescriptionUnitPriceQtyNetAmountTaxRateTaxTypeTaxAmountTotalAmount1Cotton Khadi Kurta Embroidered Pant & Chanderi Dupptta Set forWomen Brown | B0F3CWTK83 ( Mnnt-Btq-Coffee Color SuitSet-XL ) HSN:6103"],
+        "unit_prices": ["₹1,332.38"],
+        "qtys": ["1"],
+        "net_amounts": ["₹1,332.38"],
+    },
+    "invoice_3.pdf": {
+        "descriptions": ["of 1For R K WorldInfocom Pvt Ltd:Authorized SignatoryOrder Number:407-8623089-0137139Invoice Number :SBLY-167144Order Date:11.05.2025Invoice Details :KA-SBLY-1293787125-2526Invoice Date :11.05.2025Sl.NoDescriptionUnitPriceQtyNetAmountTaxRateTaxTypeTaxAmountTotalAmount1UrbanGabru Charcoal Black Peel Off Mask for Men & Women |Removes Blackheads and Whiteheads | Active Cooling Effect | DeepSkin Purifying Cleansing (60 gm) | B0777K7BLR ( B0777K7BLR ) HSN:33049990"],
+        "unit_prices": ["₹160.16"],
+        "qtys": ["1"],
+        "net_amounts": ["₹160.16"],
+    },
+}
+
+@pytest.fixture(scope="module")
+def texts():
+    return {name: extract_page_text(os.path.join(DATA_DIR, name)) for name in EXPECTED_FIELDS}
+
+@pytest.mark.parametrize("name", sorted(EXPECTED_FIELDS))
+def test_extract_fields_matches_original(texts, name):
+    fields = extract_fields(texts[name])
+    assert fields == EXPECTED_FIELDS[name]
+    assert list(fields) == list(EXPECTED_FIELDS[name])
+
+@pytest.mark.parametrize("name", sorted(EXPECTED_FIELDS))
+def test_parse_invoice_text_matches_original(texts, name):
+    result = parse_invoice_text(texts[name], name)
+    expected = {**EXPECTED_FIELDS[name], **EXPECTED_TEXT_TABLES[name], "filename": name, "status": "success"}
+    # "layout" was added after the original implementation, at the end
+    assert result.pop("layout") == "amazon_in"
+    assert result == expected
+    assert list(result) == list(expected)
+
+@pytest.mark.parametrize("name", sorted(EXPECTED_FIELDS))
+def test_generic_layout_matches_original(texts, name):
+    # The catch-all template matches labels in any case and spacing, with the same results here
+    assert extract_fields(texts[name], LAYOUT_TEMPLATES[-1]) == EXPECTED_FIELDS[name]
@@ -0,0 +1,130 @@
+"""
+On-disk cache of the first-page text of each PDF and its positioned table lines,
+zlib-compressed and keyed by content digest, so parsing can be re-run without pdfminer
+"""
+import os
+import json
+import zlib
+import threading
+from typing import Iterator, List, Optional, Tuple
+from extracter_logic import (
+    extract_pdf_content, extraction_error, parse_invoice_text, source_name
+)
+from result_cache import content_digest
+from metrics import stage
+
+SUFFIX = ".json.z"
+
+# Version of the entry layout; entries of another version are treated as missing.
+# 2 added the positioned table lines, without them only the first item is found
+ENTRY_FORMAT = 2
+
+
+class TextCache:
+    def __init__(self, directory: str, level: int = 6):
+        """
+        directory - cache root, entries are stored as <directory>/<digest[:2]>/<digest>.json.z
+        level     - zlib compression level
+        """
+        self.directory = directory
+        self.level = level
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + SUFFIX)
+
+    def get(self, digest: str) -> Optional[dict]:
+        """{"filename", "text", "lines"} stored for a PDF, or None (also for entries of an older format)"""
+        try:
+            with open(self._path(digest), "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        return entry if entry.get("format") == ENTRY_FORMAT else None
+
+    def set(self, digest: str, text: str, filename: str = None, lines: list = None):
+        """lines are the positioned table lines (see layout_table.page_lines)"""
+        path = self._path(digest)
+        data = zlib.compress(json.dumps({"format": ENTRY_FORMAT, "filename": filename, "text": text, "lines": lines},
+                                        ensure_ascii=False).encode("utf-8"), self.level)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            # Best effort, the text is extracted again next time
+            pass
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def digests(self) -> Iterator[str]:
+        """Digests of every cached PDF, in a stable order"""
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in sorted(os.listdir(self.directory)):
+            subdir = os.path.join(self.directory, prefix)
+            if not os.path.isdir(subdir):
+                continue
+            for name in sorted(os.listdir(subdir)):
+                if name.endswith(SUFFIX):
+                    yield name[:-len(SUFFIX)]
+
+    def digest_batches(self, size: int) -> Iterator[List[str]]:
+        """digests() in lists of up to size, one unit of re-extraction work each"""
+        batch = []
+        for digest in self.digests():
+            batch.append(digest)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def extract_cached(source, filename: str = None, cache_dir: str = None, digest: str = None) -> dict:
+    """
+    extract_invoice_data that keeps the page text in the TextCache at cache_dir,
+    so each distinct PDF goes through pdfminer once. Runs in the worker.
+    """
+    filename = filename or source_name(source)
+    if digest is None:
+        # Hash the bytes, then parse from memory rather than reading twice
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                source = f.read()
+        elif not isinstance(source, (bytes, bytearray, memoryview)):
+            source = source.read()
+        digest = content_digest(source)
+
+    cache = TextCache(cache_dir)
+    with stage("text_cache_read"):
+        entry = cache.get(digest)
+    if entry is not None:
+        return parse_invoice_text(entry["text"], filename, entry["lines"])
+
+    try:
+        with stage("pdf_parse"):
+            text, lines = extract_pdf_content(source)
+    except Exception as e:
+        return extraction_error(e)
+
+    cache.set(digest, text, filename, lines)
+    return parse_invoice_text(text, filename, lines)
+
+
+def reextract_batch(cache_dir: str, digests: List[str]) -> List[Tuple[str, Optional[dict]]]:
+    """
+    Re-run the field and table parsers over cached texts: [(digest, result), ...].
+    The result is None for entries of an older format, whose PDF has to be extracted again.
+    """
+    cache = TextCache(cache_dir)
+    results = []
+    for digest in digests:
+        entry = cache.get(digest)
+        if entry is None:
+            results.append((digest, None))
+        else:
+            results.append((digest, parse_invoice_text(entry["text"], entry["filename"], entry["lines"])))
+    return results
@@ -0,0 +1,280 @@
+"""
+Executor backends used by the API to run invoice extraction off the event loop
+"""
+import os
+import queue
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+
+try:
+    import resource
+except ImportError:  # Windows: no memory limit
+    resource = None
+
+# Backend configuration (override through environment variables)
+# "thread"   - ThreadPoolExecutor, the default, fine for small deployments
+# "process"  - ProcessPoolExecutor, one extraction per core without the GIL
+# "isolated" - IsolatedExecutor, one killable process per worker with a time
+#              and memory budget per file
+EXTRACTION_BACKEND = os.getenv("EXTRACTION_BACKEND", "thread").lower()
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0"))  # 0 = backend default
+EXTRACTION_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACTION_MAX_TASKS_PER_CHILD", "500"))
+
+# Budget per task of the isolated backend (0 disables either limit)
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "60"))
+EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024"))
+
+BACKENDS = ("thread", "process", "isolated")
+
+
+class WorkerLimitExceeded(Exception):
+    """A task ran past its time limit or took its worker process down"""
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason  # "timeout" or "worker_crashed"
+
+
+def _init_worker():
+    """Import the extraction stack once when a worker process starts"""
+    importlib.import_module("extracter_logic")
+
+
+def _ping(sample: str = None) -> int:
+    if sample:
+        # One extraction loads the font metrics and CMaps pdfminer reads on first use
+        from extracter_logic import extract_invoice_data
+        extract_invoice_data(sample)
+    return os.getpid()
+
+
+def _isolated_worker(conn, memory_limit_mb: int):
+    """Process side of IsolatedExecutor: run the tasks received over conn, one at a time"""
+    if memory_limit_mb and resource is not None:
+        # Allocations past the limit raise MemoryError inside the task
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    _init_worker()
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args, kwargs = task
+        try:
+            result = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send((False, RuntimeError(f"Could not return the task result: {e}")))
+
+
+class IsolatedExecutor(Executor):
+    """
+    Executor with one worker process per slot, each running a single task at a
+    time. A task that runs longer than timeout seconds gets its process killed
+    and fails with WorkerLimitExceeded("timeout"); a process that dies (e.g.
+    killed by the OOM killer) fails its task with "worker_crashed". Either way
+    the slot starts a fresh process for the next task. Memory is capped per
+    process with RLIMIT_AS, so a runaway PDF raises MemoryError in its own task.
+    """
+    def __init__(self, max_workers: int, timeout: float = None, memory_limit_mb: int = None,
+                 max_tasks_per_child: int = None):
+        self._max_workers = max_workers
+        self.timeout = EXTRACTION_TIMEOUT if timeout is None else timeout
+        self.memory_limit_mb = EXTRACTION_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeouts = 0
+        self.crashes = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = queue.Queue()
+        self._shutdown = False
+        # Slot threads start on the first submit, so a server that creates the
+        # executor at import time can still be preloaded and forked safely
+        self._slots = []
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        if not self._slots:
+            with self._start_lock:
+                if not self._slots:
+                    self._slots = [
+                        threading.Thread(target=self._run_slot, name=f"isolated-worker-{i}", daemon=True)
+                        for i in range(self._max_workers)
+                    ]
+                    for slot in self._slots:
+                        slot.start()
+        future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in self._slots:
+            self._tasks.put(None)
+        if wait:
+            for slot in self._slots:
+                slot.join()
+
+    def _start_process(self) -> tuple:
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_isolated_worker, args=(child_conn, self.memory_limit_mb),
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        return process, conn
+
+    @staticmethod
+    def _stop_process(process, conn, kill: bool = False):
+        if kill:
+            process.kill()
+        else:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        conn.close()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _run_slot(self):
+        process = conn = None
+        done = 0
+        while True:
+            item = self._tasks.get()
+            if item is None:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if process is None:
+                process, conn = self._start_process()
+                done = 0
+
+            try:
+                conn.send((fn, args, kwargs))
+            except Exception as e:
+                # Arguments that cannot be pickled, the worker is unaffected
+                future.set_exception(e)
+                continue
+
+            try:
+                if not conn.poll(self.timeout or None):
+                    self.timeouts += 1
+                    self._stop_process(process, conn, kill=True)
+                    process = None
+                    future.set_exception(WorkerLimitExceeded(
+                        "timeout", f"Extraction exceeded the {self.timeout:g}s time limit"))
+                    continue
+                ok, value = conn.recv()
+            except (EOFError, OSError):
+                process.join(timeout=5)
+                self.crashes += 1
+                exitcode = process.exitcode
+                self._stop_process(process, conn, kill=True)
+                process = None
+                future.set_exception(WorkerLimitExceeded(
+                    "worker_crashed", f"Extraction worker exited unexpectedly (exit code {exitcode})"))
+                continue
+
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+            done += 1
+            if self.max_tasks_per_child and done >= self.max_tasks_per_child:
+                self._stop_process(process, conn)
+                process = None
+
+        if process is not None:
+            self._stop_process(process, conn)
+
+
+def default_workers(backend: str) -> int:
+    """Worker count used when EXTRACTION_WORKERS is not set"""
+    if backend in ("process", "isolated"):
+        return os.cpu_count() or 1
+    return 5
+
+
+def create_executor(backend: str = None, workers: int = None,
+                    max_tasks_per_child: int = None) -> Executor:
+    """
+    Create the executor that runs extract_invoice_data.
+    Worker processes are recycled after max_tasks_per_child extractions (0 disables recycling).
+    """
+    backend = (backend or EXTRACTION_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend '{backend}', expected one of {BACKENDS}")
+
+    workers = workers or EXTRACTION_WORKERS or default_workers(backend)
+
+    if backend == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+
+    if max_tasks_per_child is None:
+        max_tasks_per_child = EXTRACTION_MAX_TASKS_PER_CHILD
+
+    if backend == "isolated":
+        return IsolatedExecutor(workers, max_tasks_per_child=max_tasks_per_child or None)
+
+    # "spawn" works on every platform and is required for max_tasks_per_child
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        max_tasks_per_child=max_tasks_per_child or None,
+    )
+
+
+def warm_up(executor: Executor, sample: str = None) -> int:
+    """
+    Start every worker ahead of the first request so no upload pays for
+    process start-up and the pdfminer import. With a sample PDF every worker
+    also extracts it once. Returns the number of worker processes started.
+    """
+    processes = isinstance(executor, (ProcessPoolExecutor, IsolatedExecutor))
+    if not processes and not sample:
+        return 0
+
+    futures = [executor.submit(_ping, sample) for _ in range(executor._max_workers)]
+    wait(futures)
+    if not processes:
+        return 0
+    return len({f.result() for f in futures if f.exception() is None})
+
+
+def queue_depth(executor: Executor) -> int:
+    """Tasks submitted to the executor that no worker has picked up yet"""
+    if isinstance(executor, IsolatedExecutor):
+        return executor._tasks.qsize()
+    if isinstance(executor, ThreadPoolExecutor):
+        return executor._work_queue.qsize()
+    if isinstance(executor, ProcessPoolExecutor):
+        # Pending items include the ones running, one per worker at most
+        return max(len(executor._pending_work_items) - executor._max_workers, 0)
+    return 0
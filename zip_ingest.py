@@ -0,0 +1,90 @@
+"""
+Reading invoice PDFs out of a ZIP archive one member at a time, so only the
+members being extracted are ever held in memory (or spooled to disk)
+"""
+import os
+import hashlib
+import zipfile
+import tempfile
+from typing import List
+
+# Archive limits, guarding against zip bombs (override through environment variables)
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "5000"))
+ZIP_MAX_MEMBER_BYTES = int(os.getenv("ZIP_MAX_MEMBER_BYTES", str(100 * 1024 * 1024)))
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class ArchiveError(ValueError):
+    """The upload is not a usable archive"""
+
+
+def open_archive(fileobj) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(fileobj)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ArchiveError(f"Not a valid ZIP archive: {str(e)}")
+
+
+def _skipped(info: zipfile.ZipInfo) -> bool:
+    # macOS resource forks ("__MACOSX/._invoice.pdf") are not PDFs despite the name
+    name = info.filename.replace("\\", "/")
+    return name.startswith("__MACOSX/") or os.path.basename(name).startswith("._")
+
+
+def pdf_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """PDF members of an archive in archive order"""
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename.lower().endswith(".pdf") and not _skipped(info)
+    ]
+    if len(members) > ZIP_MAX_MEMBERS:
+        raise ArchiveError(f"Archive has {len(members)} PDFs, maximum {ZIP_MAX_MEMBERS} allowed")
+    return members
+
+
+def read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, spool_max_bytes: int) -> tuple:
+    """
+    Decompress one member in chunks, hashing it on the way. Returns (digest, source)
+    like read_upload: the PDF bytes, or the path of a temp file for members larger
+    than spool_max_bytes, which the caller removes. Blocking, run it off the event loop.
+    """
+    if info.file_size > ZIP_MAX_MEMBER_BYTES:
+        raise ValueError(f"Member is larger than {ZIP_MAX_MEMBER_BYTES} bytes uncompressed")
+
+    hasher = hashlib.sha256()
+    chunks = []
+    size = 0
+    spool = None
+
+    try:
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+                # The size in the header can lie, so the real size is checked too
+                if size > ZIP_MAX_MEMBER_BYTES:
+                    raise ValueError(f"Member is larger than {ZIP_MAX_MEMBER_BYTES} bytes uncompressed")
+
+                if spool is None and size > spool_max_bytes:
+                    spool = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+                    spool.writelines(chunks)
+                    chunks = None
+
+                if spool is not None:
+                    spool.write(chunk)
+                else:
+                    chunks.append(chunk)
+    except:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is not None:
+        spool.close()
+        return hasher.hexdigest(), spool.name
+    return hasher.hexdigest(), b"".join(chunks)